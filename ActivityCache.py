@@ -0,0 +1,65 @@
+import os
+import hashlib
+import pandas as pd
+
+# bump this when the parsing or joining of the activity data changes so old entries are ignored
+CacheVersion = 3
+
+def fileHash(filename):
+	# content hash of a file, or a marker if it does not exist
+	if not os.path.exists(filename):
+		return 'missing'
+
+	digest = hashlib.sha256()
+
+	with open(filename, 'rb') as file:
+		for chunk in iter(lambda: file.read(1 << 20), b''):
+			digest.update(chunk)
+
+	return digest.hexdigest()
+
+class ActivityCache:
+	def __init__(self, directory=None, verbose=False):
+		self.directory = directory if directory is not None else 'cache'
+		self.verbose = verbose
+
+	def key(self, filenames) -> str:
+		# the key changes whenever any of the input files change
+		digest = hashlib.sha256(f'v{CacheVersion}'.encode())
+
+		for filename in filenames:
+			digest.update(fileHash(filename).encode())
+
+		return digest.hexdigest()
+
+	def path(self, key: str) -> str:
+		return os.path.join(self.directory, f'activity-{key[:32]}.pkl')
+
+	def load(self, key: str) -> tuple:
+		# the joined data and the rows that were joined without a location, None if there is no entry
+		path = self.path(key)
+
+		if not os.path.exists(path):
+			return None
+
+		if self.verbose:
+			print(f'Loading cached activity data from {path}')
+
+		try:
+			entry = pd.read_pickle(path)
+			return entry['data'], entry['unjoined']
+		except Exception as e:
+			print(f'Ignoring unreadable cache entry {path}: {e}')
+			return None
+
+	def save(self, key: str, data: pd.DataFrame, unjoined: pd.DataFrame):
+		os.makedirs(self.directory, exist_ok=True)
+		path = self.path(key)
+
+		# write to a temporary file first so that a partial write is never read back
+		temporary = f'{path}.{os.getpid()}.tmp'
+		pd.to_pickle({'data': data, 'unjoined': unjoined}, temporary)
+		os.replace(temporary, path)
+
+		if self.verbose:
+			print(f'Saved activity data to {path}')
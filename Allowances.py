@@ -1,22 +1,43 @@
 import pandas as pd
 
+from RateLookup import RateTable
+from RateStore import RateStore
+
+def readAllowances(filename) -> pd.DataFrame:
+    df = pd.read_csv(filename)
+    df['EffectiveDate'] = pd.to_datetime(df['EffectiveDate'])
+
+    # convert the rates to a percentage
+    df['PostingRate'] = df['PostingRate'] * 0.01
+    df['DangerRate'] = df['DangerRate'] * 0.01
+
+    return df
+
 class Allowances:
-    def __init__(self, effectiveDate=None, filename=None, verbose=False):
+    def __init__(self, effectiveDate=None, filename=None, verbose=False, store=None, useCache=True):
         self.data = None			# a dataframe containing information loaded from a file and cleaned
+        self.history = None			# every rate in the file, one row per PostName and EffectiveDate
+        self.rates = None			# the history indexed by the period each rate is in force
         self.effectiveDate = effectiveDate if effectiveDate is not None else pd.to_datetime('today').strftime('%Y-%m-%d')
         inputFilename = filename if filename is not None else 'data/AllowanceRates.csv'
 
         if verbose:
             print(f'Loading Allowances data from {inputFilename} for {self.effectiveDate}')
 
-        df = pd.read_csv(inputFilename)
-        df['EffectiveDate'] = pd.to_datetime(df['EffectiveDate'])
+        # the cleaned file is kept in the rate store and only read again after it changes
+        if useCache:
+            store = store if store is not None else RateStore(verbose=verbose)
+            self.history = store.load('Allowances', inputFilename, lambda: readAllowances(inputFilename))
+        else:
+            self.history = readAllowances(inputFilename)
+        self.rates = RateTable(self.history, 'PostName')
+
+        # the rates in force for each post are the latest ones on or before the effective date
+        self.data = self.rates.asOf(self.effectiveDate)
 
-        # convert the rates to a percentage
-        df['PostingRate'] = df['PostingRate'] * 0.01
-        df['DangerRate'] = df['DangerRate'] * 0.01
-        df = df.groupby('PostName').apply(lambda x: x.loc[x['EffectiveDate'] <= self.effectiveDate].sort_values(by='EffectiveDate', ascending=False).head(1)).reset_index(drop=True)
-        self.data = df
+    def ratesOn(self, postNames: pd.Series, dates: pd.Series) -> pd.DataFrame:
+        # the allowance rates in force for each post on each date, aligned to postNames
+        return self.rates.ratesOn(postNames, dates)
 
 if __name__ == '__main__':
     import sys
@@ -1,27 +1,15 @@
 #!/usr/local/bin/python
-import pandas as pd
-from openpyxl import load_workbook
+from Config import getConfig
+from Jobs import runJobs, parseJobs, parseNoCache
 
-from Config import Config
-from LaborData import LaborData
-
-from InvoiceStyles import styles
-from InvoiceFormat import formatHoursTab, formatHoursDetailsTab
-
-config = Config()
-
-Regions = {}
-
-versionString = f'v{config.data["version"]}'
-CountryApprovers = config.data['approvers']
-
-# get region dictionary from config and swap keys and values
-# to make it easy to look up the region name from the CLIN
-for region in config.data['regions']:
-	Regions[config.data['regions'][region]] = region
+# pandas, the labor data and the openpyxl formatting are imported where they are used,
+# so printing the usage does not load them
+config = getConfig()
 
 # construct a summary dataframe for writing into the file
-def summaryDataframe(description:str, hours:float, amount:float) -> pd.DataFrame:
+def summaryDataframe(description:str, hours:float, amount:float) -> 'pd.DataFrame':
+	import pandas as pd
+
 	data = {
 		'blank1': '',
 		'Description': description,
@@ -33,37 +21,48 @@ def summaryDataframe(description:str, hours:float, amount:float) -> pd.DataFrame
 
 	return pd.DataFrame(data, index=[0])
 
-if __name__ == '__main__':
-	import sys
-
-	if len(sys.argv) < 2:
-		print(f'Usage: {sys.argv[0]} <activity file>')
-		sys.exit(1)
-
-	filename = sys.argv[1]
-
-	labor = LaborData.fromReportFile(filename)
+def writeApprovalsWorkbook(labor: 'LaborData', clin: str, streaming=False) -> str:
 	time = labor.time
 
 	startYear = time.startYear()
 	startMonth = time.startMonthName()
 	locationInfo = time.locationsByCLIN()
 
-	for clin in locationInfo.keys():
-		prefix = config.data['filenamePrefixes']['approvals']
-		region = Regions[clin]
-		pattern = f'{prefix}-{region}-{startYear}-{startMonth}'
-		outputFile = f'{pattern}.xlsx'
-		
-		with pd.ExcelWriter(outputFile) as writer:
+	prefix = config.data['filenamePrefixes']['approvals']
+	region = config.regionsByCLIN()[clin]
+	pattern = f'{prefix}-{region}-{startYear}-{startMonth}'
+	outputFile = f'{pattern}.xlsx'
+
+	if streaming:
+		# rows are flushed to disk as they are written, for regions too large to build in memory
+		from StreamingFormat import StreamingWorkbook, writeHoursTab, writeHoursDetailsTab
+
+		with StreamingWorkbook(outputFile) as workbook:
 			for country in sorted(locationInfo[clin]):
-				byEmployee = time.employeeDetails(clin=clin, location=country)
-				byEmployee.to_excel(writer, sheet_name=f'Hours-{country}', startrow=0, startcol=0, header=True, index=False)
+				writeHoursTab(workbook, f'Hours-{country}', time.employeeDetails(clin=clin, location=country),
+					approvers=config.data['approvers'][country],
+					locationName=country, billingFrom=time.billingPeriod())
+
+				writeHoursDetailsTab(workbook, f'Details-{country}', time.dateDetails(clin=clin, location=country),
+					locationName=country, billingFrom=time.billingPeriod())
+
+		return outputFile
+
+	import pandas as pd
+	from InvoiceStyles import styles
+	from InvoiceFormat import formatHoursTab, formatHoursDetailsTab
 
-				byDate = time.dateDetails(clin=clin, location=country)
-				byDate.to_excel(writer, sheet_name=f'Details-{country}', startrow=0, startcol=0, header=True, index=False)
+	# the workbook is formatted in memory and written once when the writer closes
+	with pd.ExcelWriter(outputFile, engine='openpyxl') as writer:
+		for country in sorted(locationInfo[clin]):
+			byEmployee = time.employeeDetails(clin=clin, location=country)
+			# rows 1-3 are left free for the logo and the invoice details
+			byEmployee.to_excel(writer, sheet_name=f'Hours-{country}', startrow=3, startcol=0, header=True, index=False)
+
+			byDate = time.dateDetails(clin=clin, location=country)
+			byDate.to_excel(writer, sheet_name=f'Details-{country}', startrow=3, startcol=0, header=True, index=False)
 
-		workbook = load_workbook(outputFile)
+		workbook = writer.book
 
 		for styleName in styles.keys():
 			workbook.add_named_style(styles[styleName])
@@ -71,12 +70,41 @@ if __name__ == '__main__':
 		for country in sorted(locationInfo[clin]):
 			worksheet = workbook[f'Hours-{country}']
 			# invoiceNumber = laborInvoiceNumber + CountryCodes[location]
-			
+
 			formatHoursTab(worksheet, 
-				  approvers=CountryApprovers[country], 
+				  approvers=config.data['approvers'][country], 
 				  locationName=country, billingFrom=time.billingPeriod())
-			
+
 			worksheet = workbook[f'Details-{country}']
 			formatHoursDetailsTab(worksheet, locationName=country, billingFrom=time.billingPeriod())
 
-		workbook.save(outputFile)
\ No newline at end of file
+	return outputFile
+
+def approvalsJobs(labor: 'LaborData', streaming=False) -> list:
+	# one workbook per CLIN
+	return [(writeApprovalsWorkbook, (clin, streaming)) for clin in labor.time.locationsByCLIN().keys()]
+
+def writeApprovalsWorkbooks(labor: 'LaborData', jobs=1, streaming=False) -> list:
+	return runJobs(labor, approvalsJobs(labor, streaming), jobs)
+
+if __name__ == '__main__':
+	import sys
+
+	jobs, arguments = parseJobs(sys.argv[1:])
+
+	# --streaming writes the workbooks with XlsxWriter in constant memory mode
+	streaming = '--streaming' in arguments
+	arguments = [argument for argument in arguments if argument != '--streaming']
+
+	useCache, arguments = parseNoCache(arguments)
+
+	if len(arguments) < 1:
+		print(f'Usage: {sys.argv[0]} [--jobs N] [--no-cache] [--streaming] <activity file>')
+		sys.exit(1)
+
+	filename = arguments[0]
+
+	from LaborData import LaborData
+
+	labor = LaborData.fromReportFile(filename, useCache=useCache)
+	writeApprovalsWorkbooks(labor, jobs=jobs, streaming=streaming)
@@ -1,19 +1,62 @@
 import pandas as pd
-from openpyxl import load_workbook
-from InvoiceStyles import styles
-from InvoiceFormat import formatEmployeeInfo
 
 from EmployeeInfo import EmployeeInfo
 from Allowances import Allowances
+from RateLookup import RateTable
+from RateStore import RateStore
+from ExcelCache import readExcel
 
 Regions = {
 	'001': 'Asia',
 	'002': 'Europe'
 }
 
+def readBillingRates(filename, useCache=True) -> pd.DataFrame:
+	# Define the data type will be used when reading in the data
+	# By default, it will try to make columns that only have numbers into numbers.
+	converters = {
+		'Role ID': str,
+		'CLIN': str,
+		'Country': str,
+		'Post Name': str,
+		'Labor Category': str,
+		'Effective Date': str,
+		'Billing Rate Regular': str,
+		'Billing Rate Overtime': str,
+		'Note': str
+	}
+
+	df = readExcel(filename, useCache=useCache, header=0, converters=converters)
+
+	# rename columns for internal usage
+	df.rename(columns={
+		'Role ID': 'RoleID',
+		'Post Name': 'PostName',
+		'Labor Category': 'Category',
+		'Effective Date': 'EffectiveDate',
+		'Billing Rate Regular': 'BillRateReg',
+		'Billing Rate Overtime': 'BillRateOT'
+	}, inplace=True)
+
+	# make 'EffectiveDate' a datetime object
+	df['EffectiveDate'] = pd.to_datetime(df['EffectiveDate'])
+
+	# the rates are read as text, store them as numbers and set them to zero if they are missing
+	df['BillRateReg'] = pd.to_numeric(df['BillRateReg'], errors='coerce').fillna(0)
+	df['BillRateOT'] = pd.to_numeric(df['BillRateOT'], errors='coerce').fillna(0)
+
+	df['Note'] = df['Note'].fillna('')
+
+	# strip whitespace from all string columns
+	df.applymap(lambda x: x.strip() if isinstance(x, str) else x)
+
+	return df
+
 class BillingRates:
-	def __init__(self, filename=None, effectiveDate=None, verbose=False):
+	def __init__(self, filename=None, effectiveDate=None, verbose=False, store=None, useCache=True):
 		self.data = None			# a dataframe containing information loaded from a file and cleaned
+		self.history = None			# every rate in the file, one row per RoleID and EffectiveDate
+		self.rates = None			# the history indexed by the period each rate is in force
 
 		date = effectiveDate if effectiveDate is not None else 'today'
 		self.effectiveDate = pd.to_datetime(date)
@@ -22,44 +65,17 @@ class BillingRates:
 
 		print(f'Getting billing rates effective as of {self.effectiveDate} from {ratesFilename}')
 
-		# Define the data type will be used when reading in the data
-		# By default, it will try to make columns that only have numbers into numbers.
-		converters = {
-			'Role ID': str,
-			'CLIN': str,
-			'Country': str,
-			'Post Name': str,
-			'Labor Category': str,
-			'Effective Date': str,
-			'Billing Rate Regular': str,
-			'Billing Rate Overtime': str,
-			'Note': str
-		}
-	
-		df = pd.read_excel(ratesFilename, header=0, converters=converters)
-
-		# rename columns for internal usage
-		df.rename(columns={
-			'Role ID': 'RoleID',
-			'Post Name': 'PostName',
-			'Labor Category': 'Category',
-			'Effective Date': 'EffectiveDate',
-			'Billing Rate Regular': 'BillRateReg',
-			'Billing Rate Overtime': 'BillRateOT'
-		}, inplace=True)
+		# the cleaned file is kept in the rate store and only read again after it changes
+		if useCache:
+			store = store if store is not None else RateStore(verbose=verbose)
+			self.history = store.load('BillingRates', ratesFilename, lambda: readBillingRates(ratesFilename))
+		else:
+			self.history = readBillingRates(ratesFilename, useCache=False)
 
-		# make 'EffectiveDate' a datetime object
-		df['EffectiveDate'] = pd.to_datetime(df['EffectiveDate'])
+		self.rates = RateTable(self.history, 'RoleID')
 
-		# Set BillRateReg and BillRateOT values to zero if they are NaN
-		df['BillRateReg'].fillna(0, inplace=True)
-		df['BillRateOT'].fillna(0, inplace=True)
-
-		df['Note'].fillna('', inplace=True)
-
-		# strip whitespace from all string columns
-		df.applymap(lambda x: x.strip() if isinstance(x, str) else x)
-		df = df.groupby('RoleID').apply(lambda x: x.loc[x['EffectiveDate'] <= self.effectiveDate].sort_values(by='EffectiveDate', ascending=True).head(1)).reset_index(drop=True)
+		# the rate in force for each role is the latest one on or before the effective date
+		df = self.rates.asOf(self.effectiveDate)
 
 		if verbose:
 			print(f'Loaded {len(df)} labor rates from {ratesFilename}')
@@ -67,6 +83,10 @@ class BillingRates:
 
 		self.data = df
 
+	def ratesOn(self, roleIDs: pd.Series, dates: pd.Series) -> pd.DataFrame:
+		# the billing rates in force for each role on each date, aligned to roleIDs
+		return self.rates.ratesOn(roleIDs, dates)
+
 	def joinWith(self, allowances: Allowances):
 		# join the billing rates with the hazard pay rates
 		self.data = pd.merge(self.data, allowances.data, how='left', on='PostName')
@@ -1,15 +1,36 @@
-import yaml
+import os
+
+# config.yaml and dataStyles.yaml are found next to this file, not in the current directory
+ConfigDirectory = os.path.dirname(os.path.abspath(__file__))
+ConfigFile = os.path.join(ConfigDirectory, 'config.yaml')
+
+sharedConfig = None	# the Config returned by getConfig(), shared by every module in the process
 
 class Config:
     def __init__(self, filename=None):
-        inputFilename = filename if filename is not None else 'config.yaml'
-        config = yaml.safe_load(open(inputFilename))
-        self.data = config
-        self.filename = inputFilename # for updating later
+        self.filename = filename if filename is not None else ConfigFile # for updating later
+        self.loaded = None # the parsed settings, read the first time data is used
+
+    @property
+    def data(self) -> dict:
+        if self.loaded is None:
+            import yaml
+
+            with open(self.filename) as file:
+                config = yaml.safe_load(file)
+
+            # load styles from a separate file
+            stylesFilename = os.path.join(os.path.dirname(os.path.abspath(self.filename)), 'dataStyles.yaml')
+            with open(stylesFilename) as file:
+                config['dataStyles'] = yaml.safe_load(file)
+
+            self.loaded = config
 
-        # load styles from a separate file
-        styles = yaml.safe_load(open('dataStyles.yaml'))
-        self.data['dataStyles'] = styles
+        return self.loaded
+
+    def regionsByCLIN(self) -> dict:
+        # the config maps region names to CLINs, swap them to look up the region name from the CLIN
+        return {clin: region for region, clin in self.data['regions'].items()}
 
     # general set method
     def set(self, key, value):
@@ -17,6 +38,8 @@ class Config:
 
     # general write method
     def save(self, filename=None):
+        import yaml
+
         outputFilename = filename if filename is not None else self.filename
         yaml.safe_dump(self.data, open(outputFilename, 'w'), default_flow_style=False)
 
@@ -25,6 +48,16 @@ class Config:
         self.set('nextInvoiceNumber', value)
         self.save()
 
+def getConfig() -> Config:
+    # modules call this instead of Config() so importing them reads nothing
+    # and the YAML files are parsed at most once per process
+    global sharedConfig
+
+    if sharedConfig is None:
+        sharedConfig = Config()
+
+    return sharedConfig
+
 if __name__ == '__main__':
     import sys
 
@@ -1,7 +1,9 @@
 import pandas as pd
 
+from ExcelCache import readExcel
+
 class EmployeeInfo:
-	def __init__(self, filename=None, verbose=False):
+	def __init__(self, filename=None, verbose=False, useCache=True):
 		self.data = None	# a dataframe containing information loaded from a file and cleaned
 
 		filename = filename if filename is not None else 'data/EmployeeInfo.xlsx'
@@ -20,7 +22,8 @@ class EmployeeInfo:
 			'Note': str
 		}
 	
-		df = pd.read_excel(filename, header=0, converters=converters)
+		# useCache=False parses the workbook even if an unchanged copy is cached
+		df = readExcel(filename, useCache=useCache, header=0, converters=converters)
 
 		# rename columns for internal usage
 		df.rename(columns={
@@ -4,32 +4,15 @@ import os
 import glob
 import re
 from datetime import datetime
-from ast import literal_eval
 import pandas as pd
 import numpy as np
-from xml.sax import ContentHandler, parse
 
 from EmployeeInfo import EmployeeInfo
 from BillingRates import BillingRates
 from Allowances import Allowances
 
-from openpyxl import load_workbook
-from InvoiceStyles import styles
-from InvoiceFormat import formatTimeByDate, formatTimeByEmployee
-
-from Config import Config
-config = Config()
-
-contractNumber = config.data['contractNumber']
-baseYear = config.data['baseYear']
-upchargeRate = config.data['upchargeRate']
-# clins = config.data['regions']
-
-# get region dictionary from config and swap keys and values
-# to make it easy to look up the region name from the CLIN
-Regions = {}
-for region in config.data['regions']:
-	Regions[config.data['regions'][region]] = region
+from Config import getConfig
+config = getConfig()
 
 TaskNames = {
 	'3322': 'Regular',
@@ -72,6 +55,19 @@ RateTypes = {
 	'Admin': 'Regular'
 }
 
+# columns of the activity export, in the order they appear in the file
+ActivityColumns = ['EmployeeName', 'EmployeeID', 'Date', 'Description', 'TaskName', 'Hours', 'State']
+
+# the text columns repeat a small set of values, so the fast ingest reads them as categories
+ActivityDtypes = {
+	'EmployeeName': 'category',
+	'EmployeeID': 'category',
+	'Date': 'category',
+	'Description': 'category',
+	'TaskName': 'category',
+	'State': 'category'
+}
+
 def formatName(text):
 	# print(f'formatName({text})')
 	tokens = text.split(' ')
@@ -96,65 +92,170 @@ def formatName(text):
 
 	return f'{lastName}, {firstName}'
 
+def formatNames(names: pd.Series) -> pd.Series:
+	# vectorized version of formatName()
+	if names.empty:
+		return names
+
+	tokens = names.str.split(' ', expand=True).reindex(columns=range(4))
+	counts = names.str.count(' ') + 1
+
+	lastName = tokens[0]
+	firstName = tokens[1]
+
+	# hacktastic - eat extra spaces
+	middleInitial = tokens[3].where(counts > 3, tokens[2].where(counts > 2, ''))
+
+	withMiddle = lastName + ', ' + firstName + ' ' + middleInitial
+	withoutMiddle = lastName + ', ' + firstName
+	formatted = withoutMiddle.where(middleInitial.eq(''), withMiddle)
+
+	# not a name
+	return formatted.where(counts >= 2, names)
+
 def cleanupTask(text):
 	if text in TaskMap:
 		return TaskMap[text]
 	
 	return text
 
-def rate(row):
-	if row['RateType'] == 'Overtime':
-		return row['BillRateOT']
-	
-	if row['RateType'] == 'Regular':
-		return row['BillRateReg']
-	
-	return 0
+def cleanupTasks(tasks: pd.Series) -> pd.Series:
+	# vectorized version of cleanupTask()
+	return tasks.replace(TaskMap)
 
-def description(row):
-	if row['RateType'] == 'Overtime':
-		return '(Overtime)'
-	
-	if row['RateType'] == 'Regular':
-		return row['Category']
-	
-	return 0	
+def mapCategories(series: pd.Series, function) -> pd.Series:
+	# run a vectorized function over the distinct values of a categorical and expand the result to every row
+	mapped = function(pd.Series(series.cat.categories))
+
+	# missing values have code -1, point them at a trailing missing value
+	codes = series.cat.codes.to_numpy()
+	codes = np.where(codes < 0, len(mapped), codes)
+	values = mapped.reindex(range(len(mapped) + 1)).to_numpy()[codes]
+
+	return pd.Series(values, index=series.index)
+
+def readActivity(filename):
+	# read from csv in latin1 encoding
+	df = pd.read_csv(filename, encoding='latin1')
+		
+	# df = pd.read_csv(filename, converters=converters)
+	df.columns = ActivityColumns
+
+	# fill down the missing EmployeeName values
+	df['EmployeeName'] = df['EmployeeName'].fillna(method='ffill')
+
+	# remove rows where the Hours are missing
+	df = df.dropna(subset=['Hours'])
+
+	# we only care about the rows that start with our contract number in the Description
+	df = df.loc[df['Description'].str.startswith('19AQMM23C0047')]
+
+	# strip whitespace from all string columns
+	df.applymap(lambda x: x.strip() if isinstance(x, str) else x)
+
+	# clean up values 
+	df['EmployeeName'] = df['EmployeeName'].apply(formatName)
+
+	df['Hours'] = pd.to_numeric(df['Hours'], errors="coerce")
+	df['TaskName'] = df['TaskName'].apply(cleanupTask)
+	df['Date'] = pd.to_datetime(df['Date'], errors="coerce")
+	df['RateType'] = df['TaskName'].map(lambda x: RateTypes.get(x, 'Unknown'))
+
+	return df
+
+def readActivityFast(filename, engine=None):
+	# same result as readActivity() but reads the text columns as categories
+	# and cleans up each distinct value once instead of every row
+	# the header names in the export are not ours, so the dtypes are matched by position
+	header = pd.read_csv(filename, encoding='latin1', nrows=0).columns
+	dtypes = {header[i]: ActivityDtypes[name] for i, name in enumerate(ActivityColumns) if name in ActivityDtypes}
+
+	df = pd.read_csv(filename, encoding='latin1', dtype=dtypes, engine=engine)
+	df.columns = ActivityColumns
+
+	# fill down the missing EmployeeName values
+	df['EmployeeName'] = df['EmployeeName'].ffill()
+
+	# remove rows where the Hours are missing
+	df = df.dropna(subset=['Hours'])
+
+	# we only care about the rows that start with our contract number in the Description
+	df = df.loc[df['Description'].str.startswith('19AQMM23C0047')]
+
+	# clean up values
+	df['EmployeeName'] = mapCategories(df['EmployeeName'], formatNames)
+	df['TaskName'] = mapCategories(df['TaskName'], cleanupTasks)
+	df['Date'] = mapCategories(df['Date'], lambda dates: pd.to_datetime(dates, errors="coerce"))
+	df['Hours'] = pd.to_numeric(df['Hours'], errors="coerce")
+	df['RateType'] = df['TaskName'].map(RateTypes).fillna('Unknown')
+
+	# the remaining categories go back to plain strings so that groupby and pivot_table
+	# only produce the combinations that are actually in the data
+	for column in ['EmployeeID', 'Description', 'State']:
+		df[column] = df[column].astype(object)
+
+	return df
+
+def rates(df):
+	# overtime hours bill at the overtime rate, regular hours at the regular rate, anything else is not billed
+	isOvertime = df['RateType'].eq('Overtime').to_numpy()
+	isRegular = df['RateType'].eq('Regular').to_numpy()
+
+	return np.select(
+		[isOvertime, isRegular],
+		[df['BillRateOT'].to_numpy(dtype=object), df['BillRateReg'].to_numpy(dtype=object)],
+		default=0
+	)
+
+def priceByDate(df, billingRates=None, allowances=None):
+	# price every row at the rates in force on its own Date instead of the end of the billing period,
+	# rows with no rate in force on their date keep the rates they were joined with
+	if billingRates is not None:
+		billed = billingRates.ratesOn(df['RoleID'], df['Date'])
+		inForce = billed['EffectiveDate'].notna().to_numpy()
+
+		for column in ['BillRateReg', 'BillRateOT']:
+			df[column] = np.where(inForce, billed[column].to_numpy(dtype=object), df[column].to_numpy(dtype=object))
+
+	if allowances is not None:
+		allowed = allowances.ratesOn(df['PostName'], df['Date'])
+		inForce = allowed['EffectiveDate'].notna().to_numpy()
+
+		for column in ['PostingRate', 'DangerRate']:
+			df[column] = np.where(inForce, allowed[column].to_numpy(), df[column].to_numpy())
+
+	return df
+
+def descriptions(df):
+	# overtime is listed as '(Overtime)' under the regular line item for the category
+	isOvertime = df['RateType'].eq('Overtime').to_numpy()
+	isRegular = df['RateType'].eq('Regular').to_numpy()
+	overtime = np.full(len(df), '(Overtime)', dtype=object)
+
+	return np.select(
+		[isOvertime, isRegular],
+		[overtime, df['Category'].to_numpy(dtype=object)],
+		default=0
+	)
 
 class EmployeeTime:
-	def __init__(self, filename=None, verbose=False):
+	def __init__(self, filename=None, verbose=False, fast=False, engine=None):
 		self.data = None	# a dataframe containing the full billing information loaded from a file
 		self.dateStart = datetime(1970,1,1)	# start date of the billing period loaded from a file
 		self.dateEnd = datetime(3000,1,1)	# end date of the billing period loaded from a file
+		self.cachedDetails = None	# cached pivot of the full data used by details(), rebuilt after joinWith()
+		self.partitions = None	# row positions by CLIN and Country used by slice(), rebuilt after joinWith()
+		self.unjoined = None	# the rows joinWith() found no employee location for, kept with cached data
 
 		if filename is not None:
 			if verbose:
 				print(f'Parsing activity data from {filename}')
 			
-			# read from csv in latin1 encoding
-			df = pd.read_csv(filename, encoding='latin1')
-				
-			# df = pd.read_csv(filename, converters=converters)
-			df.columns = ['EmployeeName', 'EmployeeID', 'Date', 'Description', 'TaskName', 'Hours', 'State']
-
-			# fill down the missing EmployeeName values
-			df['EmployeeName'] = df['EmployeeName'].fillna(method='ffill')
-
-			# remove rows where the Hours are missing
-			df = df.dropna(subset=['Hours'])
-
-			# we only care about the rows that start with our contract number in the Description
-			df = df.loc[df['Description'].str.startswith('19AQMM23C0047')]
-
-			# strip whitespace from all string columns
-			df.applymap(lambda x: x.strip() if isinstance(x, str) else x)
-
-			# clean up values 
-			df['EmployeeName'] = df['EmployeeName'].apply(formatName)
-
-			df['Hours'] = pd.to_numeric(df['Hours'], errors="coerce")
-			df['TaskName'] = df['TaskName'].apply(cleanupTask)
-			df['Date'] = pd.to_datetime(df['Date'], errors="coerce")
-			df['RateType'] = df['TaskName'].map(lambda x: RateTypes.get(x, 'Unknown'))
+			# engine is passed to pandas.read_csv, e.g. 'pyarrow'
+			if fast:
+				df = readActivityFast(filename, engine=engine)
+			else:
+				df = readActivity(filename)
 
 			df.sort_values(['Date'], ascending=[True], inplace=True)
 			self.dateStart = df['Date'].min()
@@ -167,44 +268,109 @@ class EmployeeTime:
 
 			self.data = df
 			
-	def joinWith(self, employeeInfo):
+	@classmethod
+	def fromJoinedData(cls, data: pd.DataFrame, unjoined: pd.DataFrame = None) -> 'EmployeeTime':
+		# rebuild from data that has already been through joinWith(), e.g. from a cache,
+		# warning again about the rows it found without a location
+		time = cls()
+		time.data = data
+		time.dateStart = data['Date'].min()
+		time.dateEnd = data['Date'].max()
+		time.unjoined = unjoined
+
+		if unjoined is not None:
+			time.reportUnjoined()
+
+		return time
+
+	def reportUnjoined(self):
+		if len(self.unjoined) > 0:
+			print(f'{len(self.unjoined)} records do not have a location:')
+			print(self.unjoined)
+
+	def joinWith(self, employeeInfo, billingRates=None, allowances=None):
+		# employeeInfo carries the rates as of the end of the period, passing billingRates
+		# and allowances reprices each row at the rates in force on its Date
 		if employeeInfo.data is None:
 			# nothing to do
 			return
 
 		joined = self.data.join(employeeInfo.data.set_index('EmployeeID'), on='EmployeeID', how='left', rsuffix='_info')
 
-		unjoinedTime = joined.loc[joined['Country'].isna()]
-		if len(unjoinedTime) > 0:
-			print(f'{len(unjoinedTime)} records do not have a location:')
-			print(unjoinedTime)
+		self.unjoined = joined.loc[joined['Country'].isna()]
+		self.reportUnjoined()
 		
 		# zero pad the CLIN to be 3 digit string
 		joined['CLIN'] = joined['CLIN'].str.zfill(3)
 
 		# lookup the Region from the CLIN
-		joined['Region'] = joined['CLIN'].map(Regions)
+		joined['Region'] = joined['CLIN'].map(config.regionsByCLIN())
 
 		joined['Country'] = joined['Country'].fillna('Unknown')
-		joined['Rate'] = joined.apply(rate, axis=1)
+		joined = priceByDate(joined, billingRates, allowances)
+		joined['Rate'] = rates(joined)
 		joined['Rate'] = pd.to_numeric(joined['Rate'], errors="coerce")
-		joined['Description'] = joined.apply(description, axis=1)
-		joined['RoleID'] = joined['RoleID'].str.replace('X', baseYear)
+		joined['Description'] = descriptions(joined)
+		joined['RoleID'] = joined['RoleID'].str.replace('X', config.data['baseYear'])
 		
 		# reorder the columns to be more useful
 		joined = joined[['Date', 'CLIN', 'Region', 'Country', 'PostName', 'RoleID', 'Category', 'Description', 'EmployeeName', 'TaskName', 'Hours', 'State', 'Rate', 'HourlyRate', 'PostingRate', 'DangerRate']]
 	
 		self.data = joined
 
+		# the data changed, so any cached details and partitions are stale
+		self.cachedDetails = None
+		self.partitions = None
+
+	def partitionIndex(self):
+		# row positions for every CLIN, Country and CLIN/Country pair, found in a single pass each
+		if self.partitions is None:
+			self.partitions = {
+				'clin': self.data.groupby('CLIN', sort=False).indices,
+				'location': self.data.groupby('Country', sort=False).indices,
+				'clinLocation': self.data.groupby(['CLIN', 'Country'], sort=False).indices
+			}
+
+		return self.partitions
+
+	def slice(self, clin=None, location=None) -> pd.DataFrame:
+		# rows for a CLIN and/or location without scanning or copying the full data
+		if clin is None and location is None:
+			return self.data
+
+		partitions = self.partitionIndex()
+
+		if clin is not None and location is not None:
+			rows = partitions['clinLocation'].get((clin, location))
+		elif clin is not None:
+			rows = partitions['clin'].get(clin)
+		else:
+			rows = partitions['location'].get(location)
+
+		if rows is None:
+			return self.data.iloc[0:0]
+
+		return self.data.iloc[rows]
+
 	def details(self, clin=None, location=None):
-		df = self.data.copy()
-		
+		# the pivot is built once for all of the data and sliced for each CLIN and location
+		if self.cachedDetails is None:
+			self.cachedDetails = self.buildDetails()
+
+		df = self.cachedDetails
+
 		if clin is not None:
 			df = df.loc[df['CLIN'] == clin]
 
 		if location is not None:
 			df = df.loc[df['Country'] == location]
 
+		# callers modify the result in place, so never hand out the cached frame
+		return df.copy()
+
+	def buildDetails(self):
+		df = self.data
+
 		grouped = df.groupby(['Date', 'CLIN', 'Country', 'PostName', 'RoleID', 'Category', 'EmployeeName', 'TaskName', 'Rate', 'HourlyRate', 'PostingRate', 'DangerRate'], as_index=False).agg({'Hours': 'sum'})
 
 		pivot = grouped.pivot_table(index=[
@@ -212,7 +378,8 @@ class EmployeeTime:
 			'Rate', 'HourlyRate', 'PostingRate', 'DangerRate'
 		], columns='TaskName', values='Hours').reset_index()
 
-		pivot.sort_values(['EmployeeName'], ascending=[True], inplace=True)
+		# stable so that slices of the cached pivot keep the same order as the full pivot
+		pivot.sort_values(['EmployeeName'], ascending=[True], kind='stable', inplace=True)
 
 		for taskName in TaskNames.values():
 			if taskName not in pivot.columns:
@@ -268,27 +435,18 @@ class EmployeeTime:
 
 		result = {}
 		for clin in self.data['CLIN'].unique():
-			clinData = self.data.loc[self.data['CLIN'] == clin]
+			result[clin] = []
 
-			locations = []
-			for location in clinData['Country'].unique():
-				locations.append(location)
-
-			result[clin] = locations
+		for clin, location in self.partitionIndex()['clinLocation'].keys():
+			result[clin].append(location)
 
 		return result
 	
 	def groupedForInvoicing(self, clin=None, location=None):
-		invoiceDetail = self.data.copy()
-
-		if clin is not None:
-			invoiceDetail = invoiceDetail.loc[invoiceDetail['CLIN'] == clin]
-
-		if location is not None:
-			invoiceDetail = invoiceDetail.loc[invoiceDetail['Country'] == location]
+		invoiceDetail = self.slice(clin=clin, location=location)
 
 		# NOTE: ONLY uses Approved hours
-		omittedDetails = invoiceDetail.loc[self.data['State'] != 'Approved']
+		omittedDetails = invoiceDetail.loc[invoiceDetail['State'] != 'Approved']
 
 		if len(omittedDetails) > 0:
 			print(f'\nHours omitted because of state for CLIN: {clin}, {location}: {len(omittedDetails)}')
@@ -304,15 +462,12 @@ class EmployeeTime:
 		return invoiceDetail
 	
 	def postByCountry(self, clin=None):
-		costDetail = self.details()
-
-		if clin is not None:
-			costDetail = costDetail.loc[costDetail['CLIN'] == clin]
+		costDetail = self.details(clin=clin)
 
 		posts = costDetail.groupby(['Country'], as_index=False).agg({'Posting': 'sum'})
 		posts['CLIN'] = '207'
 		posts['Type'] = 'Post'
-		posts['G&A'] = posts['Posting'] * upchargeRate
+		posts['G&A'] = posts['Posting'] * config.data['upchargeRate']
 		posts['Total'] = posts['Posting'] + posts['G&A']
 		posts.rename(columns={'Posting': 'Amount'}, inplace=True)
 		posts = posts[['CLIN', 'Country', 'Type', 'Amount', 'G&A', 'Total']]
@@ -321,7 +476,7 @@ class EmployeeTime:
 
 		dangers['CLIN'] = '208'
 		dangers['Type'] = 'Danger'
-		dangers['G&A'] = dangers['Danger'] * upchargeRate
+		dangers['G&A'] = dangers['Danger'] * config.data['upchargeRate']
 		dangers['Total'] = dangers['Danger'] + dangers['G&A']
 		dangers.rename(columns={'Danger': 'Amount'}, inplace=True)
 		dangers = dangers[['CLIN', 'Country', 'Type', 'Amount', 'G&A', 'Total']]
@@ -333,33 +488,19 @@ class EmployeeTime:
 		return costs
 	
 	def postSummaryByPostName(self, clin=None):
-		costDetail = self.details()
-
-		if clin is not None:
-			costDetail = costDetail.loc[costDetail['CLIN'] == clin]
+		costDetail = self.details(clin=clin)
 
 		summary = costDetail.groupby(['Country', 'PostName'], as_index=False).agg({'Posting': 'sum'})
 		return summary
 
 	def dangerPaySummaryByPostName(self, clin=None):
-		costDetail = self.details()
-
-		if clin is not None:
-			costDetail = costDetail.loc[costDetail['CLIN'] == clin]
+		costDetail = self.details(clin=clin)
 
 		summary = costDetail.groupby(['Country', 'PostName'], as_index=False).agg({'Danger': 'sum'})
 		return summary
 
 	def groupedForHoursReport(self, clin=None, location=None):
-		data = self.data.copy()
-
-		detail = self.data.copy()
-
-		if clin is not None:
-			detail = detail.loc[detail['CLIN'] == clin]
-
-		if location is not None:
-			detail = detail.loc[detail['Country'] == location]
+		detail = self.slice(clin=clin, location=location)
 
 		detail = detail.groupby(['RoleID', 'Description', 'EmployeeName', 'Rate'], as_index=False).agg({'Hours': 'sum'})
 		detail['Amount'] = detail['Hours'] * detail['Rate']
@@ -409,13 +550,13 @@ class EmployeeTime:
 		details.drop(columns=['CLIN'], inplace=True)
 		# details.sort_values(['Date', 'EmployeeName'], inplace=True)
 
-		grouped = details.groupby(['RoleID', 'EmployeeName'], as_index=False).agg({
+		# a rate that changes during the period gets a line for each rate, like groupedForInvoicing
+		grouped = details.groupby(['RoleID', 'EmployeeName', 'PostingRate'], as_index=False).agg({
 			'Country': 'first',
 			'PostName': 'first',
 			'Regular': 'sum',
 			'HourlyRate': 'first',
 			'RegularWages': 'sum',
-			'PostingRate': 'first',
 			'Posting': 'sum'
 		})
 
@@ -444,13 +585,13 @@ class EmployeeTime:
 
 		# print(f'debug groupedForDangerReport: for {clin}, {location}: {details.PostName.unique()}')
 
-		grouped = details.groupby(['RoleID', 'EmployeeName'], as_index=False).agg({
+		# a rate that changes during the period gets a line for each rate, like groupedForInvoicing
+		grouped = details.groupby(['RoleID', 'EmployeeName', 'DangerRate'], as_index=False).agg({
 			'Country': 'first',
 			'PostName': 'first',
 			'Regular': 'sum',
 			'HourlyRate': 'first',
 			'RegularWages': 'sum',
-			'DangerRate': 'first',
 			'Danger': 'sum'
 		})
 
@@ -478,13 +619,7 @@ class EmployeeTime:
 	
 	# for status report
 	def byEmployee(self, clin=None, location=None):
-		df = self.data.copy()
-
-		if clin is not None:
-			df = df.loc[df['CLIN'] == clin]
-
-		if location is not None:
-			df = df.loc[df['Country'] == location]
+		df = self.slice(clin=clin, location=location)
 
 		# print('byEmployee Countries: ', df['Country'].unique())
 
@@ -513,13 +648,7 @@ class EmployeeTime:
 		return pivot
 
 	def byDate(self, clin=None, location=None):
-		df = self.data.copy()
-
-		if clin is not None:
-			df = df.loc[df['CLIN'] == clin]
-
-		if location is not None:
-			df = df.loc[df['Country'] == location]
+		df = self.slice(clin=clin, location=location)
 
 		# print('byDate Countries: ', df['Country'].unique())
 
@@ -557,13 +686,7 @@ class EmployeeTime:
 	
 	# for status report
 	def statusByDate(self, clin=None, location=None):
-		df = self.data.copy()
-
-		if clin is not None:
-			df = df.loc[df['CLIN'] == clin]
-
-		if location is not None:
-			df = df.loc[df['Country'] == location]
+		df = self.slice(clin=clin, location=location)
 
 		# print('statusByDate Countries: ', df['Country'].unique())
 
@@ -597,6 +720,7 @@ class EmployeeTime:
 		notApproved = regionDate['State'].ne('Approved')
 
 		if notApproved.any():
+			region = config.regionsByCLIN().get(clin)
 			print(f'Warning: {notApproved.sum()} hours not approved for {region} CLIN {clin}')
 			print(regionDate.loc[notApproved])
 
@@ -689,7 +813,7 @@ if __name__ == '__main__':
 	billingRates.joinWith(allowances)
 	employees = EmployeeInfo()
 	employees.joinWith(billingRates)
-	time.joinWith(employees)
+	time.joinWith(employees, billingRates, allowances)
 
 	print(f'\nActivity from {time.dateStart} to {time.dateEnd}')
 	# now = pd.Timestamp.now().strftime("%m%d%H%M")
@@ -701,7 +825,7 @@ if __name__ == '__main__':
 	timeByEmployee = time.byEmployee()
 
 	for clin in sorted(time.data.CLIN.unique()):
-		region = Regions[clin]
+		region = config.regionsByCLIN()[clin]
 		regionDate = time.statusByDate(clin=clin)
 		regionDate.sort_values(['Date', 'EmployeeName'], ascending=[False, True], inplace=True)
 
@@ -710,7 +834,7 @@ if __name__ == '__main__':
 		hoursNotApproved = status.loc[status['State'] != 'Approved']['HoursTotal'].sum()
 
 		if hoursNotApproved > 0:
-			print(f'{Regions[clin]} ({clin}): {hoursNotApproved} Hours not approved across {len(status)} employees')
+			print(f'{region} ({clin}): {hoursNotApproved} Hours not approved across {len(status)} employees')
 
 		regionEmployee = time.byEmployee(clin=clin)
 
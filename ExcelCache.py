@@ -0,0 +1,119 @@
+# Parquet copies of the Excel inputs, so a workbook is only parsed again after it changes.
+# A copy is served while the workbook has the same modification time and size, and also after
+# the workbook was saved without changes, which is caught by comparing the content hash.
+# Without pyarrow (or if a sheet can not be stored as Parquet) the workbook is read directly.
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+from ActivityCache import fileHash
+
+# bump this when the conversion changes so old copies are ignored
+ExcelCacheVersion = 1
+
+def optionName(value):
+	# converters are types or functions, they are keyed by name
+	return getattr(value, '__name__', repr(value))
+
+class ExcelCache:
+	def __init__(self, directory=None, verbose=False):
+		self.directory = directory if directory is not None else 'cache'
+		self.verbose = verbose
+
+	def path(self, filename: str, options: dict) -> str:
+		# the same workbook read with different options gets its own copy
+		described = json.dumps([ExcelCacheVersion, os.path.abspath(filename), options], sort_keys=True, default=optionName)
+		key = hashlib.sha256(described.encode()).hexdigest()
+
+		return os.path.join(self.directory, f'{os.path.basename(filename)}-{key[:16]}.parquet')
+
+	def read(self, filename: str, **options) -> pd.DataFrame:
+		# same as pd.read_excel(filename, **options)
+		path = self.path(filename, options)
+		manifestPath = f'{path}.json'
+
+		status = os.stat(filename)
+		current = {'mtime': status.st_mtime_ns, 'size': status.st_size}
+
+		manifest = None
+		if os.path.exists(path) and os.path.exists(manifestPath):
+			with open(manifestPath) as file:
+				manifest = json.load(file)
+
+		if manifest is not None:
+			unchanged = manifest['mtime'] == current['mtime'] and manifest['size'] == current['size']
+
+			if not unchanged and manifest['size'] == current['size']:
+				# touched or saved again, only the contents matter
+				current['hash'] = fileHash(filename)
+				unchanged = manifest['hash'] == current['hash']
+
+				if unchanged:
+					self.writeManifest(manifestPath, current)
+
+			if unchanged:
+				if self.verbose:
+					print(f'Loading {filename} from {path}')
+
+				try:
+					return self.load(path)
+				except Exception as e:
+					print(f'Ignoring unreadable copy of {filename} at {path}: {e}')
+
+		df = pd.read_excel(filename, **options)
+
+		if 'hash' not in current:
+			current['hash'] = fileHash(filename)
+
+		self.save(df, path, manifestPath, current)
+
+		return df
+
+	def load(self, path: str) -> pd.DataFrame:
+		df = pd.read_parquet(path)
+
+		# Parquet reads empty text cells back as None, read_excel leaves them NaN
+		for column in df.columns[df.dtypes == object]:
+			df[column] = df[column].where(df[column].notna(), np.nan)
+
+		return df
+
+	def save(self, df: pd.DataFrame, path: str, manifestPath: str, current: dict):
+		os.makedirs(self.directory, exist_ok=True)
+
+		# write to a temporary file first so that a partial write is never read back
+		temporary = f'{path}.{os.getpid()}.tmp'
+
+		try:
+			df.to_parquet(temporary, index=False)
+		except Exception as e:
+			# e.g. pyarrow is not installed or a column mixes numbers and text
+			if os.path.exists(temporary):
+				os.remove(temporary)
+
+			if self.verbose:
+				print(f'Not caching {path}: {e}')
+			return
+
+		os.replace(temporary, path)
+		self.writeManifest(manifestPath, current)
+
+		if self.verbose:
+			print(f'Saved a copy of the workbook to {path}')
+
+	def writeManifest(self, manifestPath: str, current: dict):
+		temporary = f'{manifestPath}.{os.getpid()}.tmp'
+
+		with open(temporary, 'w') as file:
+			json.dump(current, file)
+
+		os.replace(temporary, manifestPath)
+
+def readExcel(filename: str, useCache=True, **options) -> pd.DataFrame:
+	# pd.read_excel through the cache, useCache=False always parses the workbook
+	if not useCache:
+		return pd.read_excel(filename, **options)
+
+	return ExcelCache().read(filename, **options)
@@ -1,21 +1,24 @@
+import io
 import datetime
-import openpyxl
+from copy import copy
 from openpyxl import load_workbook
 from openpyxl import Workbook
-from openpyxl.drawing.image import Image
 from openpyxl.worksheet.table import Table, TableStyleInfo
-from openpyxl.utils import get_column_letter
+from openpyxl.utils import get_column_letter, column_index_from_string, range_boundaries, coordinate_to_tuple
 from openpyxl.styles import Border, Side, PatternFill, Alignment
+from openpyxl.styles.cell_style import StyleArray
 
 from InvoiceStyles import styles
 
-from Config import Config
-config = Config()
-contractNumber = config.data['contractNumber']
-dataStyles = config.data['dataStyles']
+from Config import getConfig
+config = getConfig()
 
 processingDate = datetime.datetime.now().strftime('%d %b %Y')
 
+# the format functions expect the data at its final position so no cells have to be shifted:
+# written with index=False, and one row down (startrow=1) for the tabs with subtotals above
+# the header or three rows down (startrow=3) for the hours tabs
+
 thinSide = Side(style='thin', color="000000")
 thickSide = Side(style='thin', color="000000")
 yellow = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
@@ -23,6 +26,109 @@ orange = PatternFill(start_color='FFA500', end_color='FFA500', fill_type='solid'
 gray = PatternFill(start_color='D3D3D3', end_color='D3D3D3', fill_type='solid')
 blue = PatternFill(start_color='21A7F2', end_color='21A7F2', fill_type='solid')
 lightBlue = PatternFill(start_color='DCE6F1', end_color='DCE6F1', fill_type='solid')
+thinBorder = Border(left=thinSide, top=thinSide, right=thinSide, bottom=thinSide)
+
+logoFile = 'logo-MEC.png'
+logoBytes = None
+cachedHeaders = {}
+
+def logoData() -> bytes:
+    # the logo is read from disk once per process
+    global logoBytes
+
+    if logoBytes is None:
+        with open(logoFile, 'rb') as file:
+            logoBytes = file.read()
+
+    return logoBytes
+
+def logoImage() -> 'Image':
+    # the image support loads Pillow, so it is only imported once a sheet needs the logo
+    from openpyxl.drawing.image import Image
+
+    # every sheet needs its own Image to anchor, but they all share the cached bytes
+    return Image(io.BytesIO(logoData()))
+
+def invoiceHeaderTemplate(headersKey) -> list:
+    # the (row, column, value, style) entries of the invoice header that are the same on every
+    # invoice, built from config.yaml once per process for each set of column headers
+    if headersKey in cachedHeaders:
+        return cachedHeaders[headersKey]
+
+    cells = [
+        ('F1', 'Invoice', 'invoiceTitle'),
+        ('D3', 'Invoice Date:', 'invoiceHeader'),
+        ('E3', processingDate, 'invoiceValue'),
+        ('D4', 'Invoice Number:', 'invoiceHeader'),
+        ('D5', 'Invoice Amount:', 'invoiceHeader'),
+        ('D6', 'Contract Number:', 'invoiceHeader'),
+        ('E6', config.data['contractNumber'], 'invoiceValue'),
+        ('D7', 'Task Order:', 'invoiceHeader'),
+        ('D8', 'Billing From:', 'invoiceHeader'),
+        ('D9', 'Payment Terms:', 'invoiceHeader')
+    ]
+
+    row = 3
+    for line in ['line1', 'line2', 'line3', 'line4']:
+        cells.append((f'B{row}', config.data['address'][line], None)); row += 1
+
+    row += 4; toRow = row
+    cells.append((f'A{row}', 'Bill To:', 'invoiceHeader'))
+    for line in ['line1', 'line2', 'line3', 'line4', 'line5', 'line6']:
+        cells.append((f'B{row}', config.data['billTo'][line], None)); row += 1
+
+    row += 1; instructionsRow = row
+    cells.append((f'A{row}', 'ACH:', 'invoiceHeader'))
+    cells.append((f'B{row}', config.data['ach']['bank'], None)); row += 1
+    cells.append((f'A{row}', None, 'invoiceHeader'))
+    cells.append((f'B{row}', config.data['ach']['routing'], None)); row += 1
+    cells.append((f'B{row}', config.data['ach']['account'], None))
+
+    row = toRow
+    cells.append((f'D{row}', 'Remit To:', 'invoiceHeader'))
+    for line in ['line1', 'line2', 'line3', 'line4']:
+        cells.append((f'E{row}', config.data['remitTo'][line], None)); row += 1
+
+    row = instructionsRow
+    cells.append((f'D{row}', 'Invoice Questions:', 'invoiceHeader'))
+    for line in ['line1', 'line2', 'line3']:
+        cells.append((f'E{row}', config.data['questions'][line], None)); row += 1
+
+    row += 1
+    headers = config.data[headersKey]
+    for column, key in zip(['A', 'B', 'C', 'D', 'E', 'F'], ['clin', 'description', 'type', 'quantity', 'rate', 'total']):
+        cells.append((f'{column}{row}', headers[key], 'summaryTitle'))
+
+    cachedHeaders[headersKey] = [coordinate_to_tuple(coordinate) + (value, style) for coordinate, value, style in cells]
+    return cachedHeaders[headersKey]
+
+def stampInvoiceHeader(worksheet, sheetInfo, headersKey, paymentTerms):
+    # logo, addresses, payment details and column titles above the invoice lines
+    worksheet.add_image(logoImage(), 'A1')
+    worksheet.merge_cells('E5:F5')
+
+    cells = invoiceHeaderTemplate(headersKey) + [
+        (4, 5, sheetInfo['invoiceNumber'], 'invoiceValue'),
+        (5, 5, sheetInfo['invoiceAmount'], 'invoiceAmount'),
+        (7, 5, sheetInfo['taskOrder'], 'invoiceValue'),
+        (8, 5, sheetInfo['billingPeriod'], 'invoiceValue'),
+        (9, 5, paymentTerms, 'invoiceValue')
+    ]
+
+    # each named style is looked up once and its style array copied to the other cells using it
+    styleArrays = {}
+
+    for row, column, value, style in cells:
+        cell = worksheet.cell(row=row, column=column)
+
+        if value is not None:
+            cell.value = value
+
+        if style in styleArrays:
+            cell._style = copy(styleArrays[style])
+        elif style is not None:
+            cell.style = style
+            styleArrays[style] = cell._style
 
 def styleColumn(worksheet, column, type, rowStart = None, rowStop = None):
     start = 0 if rowStart is None else rowStart
@@ -30,6 +136,8 @@ def styleColumn(worksheet, column, type, rowStart = None, rowStop = None):
     style = 'defaultCell'
     width = 12
 
+    dataStyles = config.data['dataStyles']
+
     if dataStyles.get(type) is not None:
         style = dataStyles[type]['style']
         width = dataStyles[type]['width']
@@ -38,24 +146,81 @@ def styleColumn(worksheet, column, type, rowStart = None, rowStop = None):
 
     # print(f'styleColumn({column}, {type}, {start}, {stop})')
 
-    for row in range(start, stop):
-        worksheet[column][row].style = style
+    template = styleCells(columnCells(worksheet, column, start + 1, stop), style)
 
     if rowStart is None:
         worksheet.column_dimensions[column].width = width
+
+        # the column itself carries the style too so empty cells below the data match
+        if template is not None:
+            worksheet.column_dimensions[column]._style = copy(template)
     else:
         worksheet[column + str(rowStart + 1)].style = 'summaryTitle'
 
+def columnCells(worksheet, column, rowStart, rowStop):
+    # one pass down the column, worksheet[column][row] builds the whole column again for every row
+    index = column_index_from_string(column)
+    return [cells[0] for cells in worksheet.iter_rows(min_row=rowStart, max_row=rowStop, min_col=index, max_col=index)]
+
+def styleCells(cells, style):
+    # the named style is looked up once and its style array is copied into the other cells
+    template = None
+
+    for cell in cells:
+        if template is None:
+            cell.style = style
+            template = cell._style
+        else:
+            cell._style = copy(template)
+
+    return template
+
+def setCells(cells, attribute, value):
+    # the value is added to the workbook once and only its id is set on the other cells
+    key = f'{attribute}Id'
+    valueId = None
+
+    for cell in cells:
+        if valueId is None:
+            setattr(cell, attribute, value)
+            valueId = getattr(cell._style, key)
+        else:
+            if cell._style is None:
+                cell._style = StyleArray()
+            setattr(cell._style, key, valueId)
+
+def fillCells(cells, fill):
+    setCells(cells, 'fill', fill)
+
+def borderCells(cells, border):
+    setCells(cells, 'border', border)
+
+def rangeCells(worksheet, cellRange):
+    minCol, minRow, maxCol, maxRow = range_boundaries(cellRange)
+    return [cell for cells in worksheet.iter_rows(min_row=minRow, max_row=maxRow, min_col=minCol, max_col=maxCol) for cell in cells]
+
+def styleRange(worksheet, cellRange, style = None, border = None, fill = None):
+    # styles a rectangle such as 'A5:F20' in one call, the named style is applied first
+    # so the border and fill are laid over it
+    cells = rangeCells(worksheet, cellRange)
+
+    if style is not None:
+        styleCells(cells, style)
+
+    if border is not None:
+        borderCells(cells, border)
+
+    if fill is not None:
+        fillCells(cells, fill)
+
 def highlightRow(worksheet, row, color = blue, colStart = None, colStop = None):
     start = 1 if colStart is None else colStart
     stop = worksheet.max_column + 1 if colStop is None else colStop
 
-    for col in range(start, stop):
-        worksheet.cell(row=row, column=col).fill = color
+    fillCells([worksheet.cell(row=row, column=col) for col in range(start, stop)], color)
 
 def styleRow(worksheet, row, style):
-    for column in range(1, worksheet.max_column):
-        worksheet.cell(row=row, column=column).style = style
+    styleCells([worksheet.cell(row=row, column=column) for column in range(1, worksheet.max_column)], style)
 
 def columnFunction(worksheet, column, function, amountType, dataStart = None, dataStop = None, top = False):
     if amountType == 'currency':
@@ -83,8 +248,6 @@ def sumColumn(worksheet, column, amountType, dataStart = None, dataStop = None,
     columnFunction(worksheet, column, '109', amountType, dataStart, dataStop, top)
 
 def formatInvoiceTab(worksheet, sheetInfo):
-    worksheet.delete_cols(1, 1)
-
     styleColumn(worksheet, 'A', 'SubCLIN')
     styleColumn(worksheet, 'B', 'Description')
     styleColumn(worksheet, 'C', 'Name')
@@ -99,106 +262,15 @@ def formatInvoiceTab(worksheet, sheetInfo):
         sumColumn(worksheet, 'D', 'number', row[0], row[1])
         sumColumn(worksheet, 'F', 'currency', row[0], row[1])
         
-        for column in ['A', 'B', 'C', 'D', 'E', 'F']:
-            for r in range(row[0]-1, row[1]):
-                worksheet[column + str(r + 1)].border = Border(left=thinSide, top=thinSide, right=thinSide, bottom=thinSide)
+        styleRange(worksheet, f'A{row[0]}:F{row[1]}', border=thinBorder)
     
     worksheet[f'B{worksheet.max_row}'].style = 'invoiceSummaryText'
     worksheet[f'D{worksheet.max_row}'].style = 'invoiceSummaryNumber'
     worksheet[f'F{worksheet.max_row}'].style = 'invoiceSummaryCurrency'
 
-    logo = openpyxl.drawing.image.Image('logo-MEC.png')
-    worksheet.add_image(logo, 'A1')
-
-    worksheet['F1'] = 'Invoice'
-    worksheet['F1'].style = 'invoiceTitle'
-
-    worksheet['D3'] = 'Invoice Date:'
-    worksheet['D3'].style = 'invoiceHeader'
-    worksheet['E3'] = processingDate
-    worksheet['E3'].style = 'invoiceValue'
-    worksheet['D4'] = 'Invoice Number:'
-    worksheet['D4'].style = 'invoiceHeader'
-    worksheet['E4'] = sheetInfo['invoiceNumber']
-    worksheet['E4'].style = 'invoiceValue'
-    worksheet['D5'] = 'Invoice Amount:'
-    worksheet['D5'].style = 'invoiceHeader'
-    worksheet.merge_cells('E5:F5')
-    worksheet['E5'] = sheetInfo['invoiceAmount']
-    worksheet['E5'].style = 'invoiceAmount'
-    worksheet['D6'] = 'Contract Number:'
-    worksheet['D6'].style = 'invoiceHeader'
-    worksheet['E6'] = contractNumber
-    worksheet['E6'].style = 'invoiceValue'
-    worksheet['D7'] = 'Task Order:'
-    worksheet['D7'].style = 'invoiceHeader'
-    worksheet['E7'] = sheetInfo['taskOrder']
-    worksheet['E7'].style = 'invoiceValue'
-    worksheet['D8'] = 'Billing From:'
-    worksheet['D8'].style = 'invoiceHeader'
-    worksheet['E8'] = sheetInfo['billingPeriod']
-    worksheet['E8'].style = 'invoiceValue'
-    worksheet['D9'] = 'Payment Terms:'
-    worksheet['D9'].style = 'invoiceHeader'
-    worksheet['E9'] = 'Net 30'
-    worksheet['E9'].style = 'invoiceValue'
-
-    row = 3
-    worksheet['B' + str(row)] = config.data['address']['line1']; row += 1
-    worksheet['B' + str(row)] = config.data['address']['line2']; row += 1
-    worksheet['B' + str(row)] = config.data['address']['line3']; row += 1
-    worksheet['B' + str(row)] = config.data['address']['line4']; row += 1
-
-    row += 4; toRow = row
-    worksheet['A' + str(row)] = 'Bill To:'
-    worksheet['A' + str(row)].style = 'invoiceHeader'
-    worksheet['B' + str(row)] = config.data['billTo']['line1']; row += 1
-    worksheet['B' + str(row)] = config.data['billTo']['line2']; row += 1
-    worksheet['B' + str(row)] = config.data['billTo']['line3']; row += 1
-    worksheet['B' + str(row)] = config.data['billTo']['line4']; row += 1
-    worksheet['B' + str(row)] = config.data['billTo']['line5']; row += 1
-    worksheet['B' + str(row)] = config.data['billTo']['line6']; row += 1
-
-    row += 1; instructionsRow = row
-    worksheet['A' + str(row)] = 'ACH:'
-    worksheet['A' + str(row)].style = 'invoiceHeader'
-    worksheet['B' + str(row)] = config.data['ach']['bank']; row += 1
-    worksheet['A' + str(row)].style = 'invoiceHeader'
-    worksheet['B' + str(row)] = config.data['ach']['routing']; row += 1
-    worksheet['B' + str(row)] = config.data['ach']['account']
-
-    row = toRow
-    worksheet['D' + str(row)] = 'Remit To:'
-    worksheet['D' + str(row)].style = 'invoiceHeader'
-    worksheet['E' + str(row)] = config.data['remitTo']['line1']; row += 1
-    worksheet['E' + str(row)] = config.data['remitTo']['line2']; row += 1
-    worksheet['E' + str(row)] = config.data['remitTo']['line3']; row += 1
-    worksheet['E' + str(row)] = config.data['remitTo']['line4']; row += 1
-
-    row = instructionsRow
-    worksheet['D' + str(row)] = 'Invoice Questions:'
-    worksheet['D' + str(row)].style = 'invoiceHeader'
-    worksheet['E' + str(row)] = config.data['questions']['line1']; row += 1
-    worksheet['E' + str(row)] = config.data['questions']['line2']; row += 1
-    worksheet['E' + str(row)] = config.data['questions']['line3']; row += 1
-
-    row += 1
-    worksheet['A' + str(row)] = config.data['laborHeaders']['clin']
-    worksheet['A' + str(row)].style = 'summaryTitle'
-    worksheet['B' + str(row)] = config.data['laborHeaders']['description']
-    worksheet['B' + str(row)].style = 'summaryTitle'
-    worksheet['C' + str(row)] = config.data['laborHeaders']['type']
-    worksheet['C' + str(row)].style = 'summaryTitle'
-    worksheet['D' + str(row)] = config.data['laborHeaders']['quantity']
-    worksheet['D' + str(row)].style = 'summaryTitle'
-    worksheet['E' + str(row)] = config.data['laborHeaders']['rate']
-    worksheet['E' + str(row)].style = 'summaryTitle'
-    worksheet['F' + str(row)] = config.data['laborHeaders']['total']
-    worksheet['F' + str(row)].style = 'summaryTitle'
+    stampInvoiceHeader(worksheet, sheetInfo, 'laborHeaders', 'Net 30')
 
 def formatCostsTab(worksheet, sheetInfo):
-    worksheet.delete_cols(1, 1)
-
     styleColumn(worksheet, 'A', 'SubCLIN')
     styleColumn(worksheet, 'B', 'Description')
     styleColumn(worksheet, 'C', 'SubCLIN')
@@ -214,110 +286,18 @@ def formatCostsTab(worksheet, sheetInfo):
         sumColumn(worksheet, 'E', 'currency', row[0], row[1])
         sumColumn(worksheet, 'F', 'currency', row[0], row[1])
         
-        for column in ['A', 'B', 'C', 'D', 'E', 'F']:
-            for r in range(row[0]-1, row[1]):
-                worksheet[column + str(r + 1)].border = Border(left=thinSide, top=thinSide, right=thinSide, bottom=thinSide)
+        styleRange(worksheet, f'A{row[0]}:F{row[1]}', border=thinBorder)
     
     worksheet[f'B{worksheet.max_row}'].style = 'invoiceSummaryText'
     worksheet[f'D{worksheet.max_row}'].style = 'invoiceSummaryCurrency'
     worksheet[f'E{worksheet.max_row}'].style = 'invoiceSummaryCurrency'
     worksheet[f'F{worksheet.max_row}'].style = 'invoiceSummaryCurrency'
 
-    logo = openpyxl.drawing.image.Image('logo-MEC.png')
-    worksheet.add_image(logo, 'A1')
-
-    worksheet['F1'] = 'Invoice'
-    worksheet['F1'].style = 'invoiceTitle'
-
-    worksheet['D3'] = 'Invoice Date:'
-    worksheet['D3'].style = 'invoiceHeader'
-    worksheet['E3'] = datetime.datetime.now().strftime('%d %b %Y')
-    worksheet['E3'].style = 'invoiceValue'
-    worksheet['D4'] = 'Invoice Number:'
-    worksheet['D4'].style = 'invoiceHeader'
-    worksheet['E4'] = sheetInfo['invoiceNumber']
-    worksheet['E4'].style = 'invoiceValue'
-    worksheet['D5'] = 'Invoice Amount:'
-    worksheet['D5'].style = 'invoiceHeader'
-    worksheet.merge_cells('E5:F5')
-    worksheet['E5'] = sheetInfo['invoiceAmount']
-    worksheet['E5'].style = 'invoiceAmount'
-    worksheet['D6'] = 'Contract Number:'
-    worksheet['D6'].style = 'invoiceHeader'
-    worksheet['E6'] = contractNumber
-    worksheet['E6'].style = 'invoiceValue'
-    worksheet['D7'] = 'Task Order:'
-    worksheet['D7'].style = 'invoiceHeader'
-    worksheet['E7'] = sheetInfo['taskOrder']
-    worksheet['E7'].style = 'invoiceValue'
-    worksheet['D8'] = 'Billing From:'
-    worksheet['D8'].style = 'invoiceHeader'
-    worksheet['E8'] = sheetInfo['billingPeriod']
-    worksheet['E8'].style = 'invoiceValue'
-    worksheet['D9'] = 'Payment Terms:'
-    worksheet['D9'].style = 'invoiceHeader'
-    worksheet['E9'] = config.data['paymentTerms']['line1']
-    worksheet['E9'].style = 'invoiceValue'
-
-    row = 3
-    worksheet['B' + str(row)] = config.data['address']['line1']; row += 1
-    worksheet['B' + str(row)] = config.data['address']['line2']; row += 1
-    worksheet['B' + str(row)] = config.data['address']['line3']; row += 1
-    worksheet['B' + str(row)] = config.data['address']['line4']; row += 1
-
-    row += 4; toRow = row
-    worksheet['A' + str(row)] = 'Bill To:'
-    worksheet['A' + str(row)].style = 'invoiceHeader'
-    worksheet['B' + str(row)] = config.data['billTo']['line1']; row += 1
-    worksheet['B' + str(row)] = config.data['billTo']['line2']; row += 1
-    worksheet['B' + str(row)] = config.data['billTo']['line3']; row += 1
-    worksheet['B' + str(row)] = config.data['billTo']['line4']; row += 1
-    worksheet['B' + str(row)] = config.data['billTo']['line5']; row += 1
-    worksheet['B' + str(row)] = config.data['billTo']['line6']; row += 1
-
-    row += 1; instructionsRow = row
-    worksheet['A' + str(row)] = 'ACH:'
-    worksheet['A' + str(row)].style = 'invoiceHeader'
-    worksheet['B' + str(row)] = config.data['ach']['bank']; row += 1
-    worksheet['A' + str(row)].style = 'invoiceHeader'
-    worksheet['B' + str(row)] = config.data['ach']['routing']; row += 1
-    worksheet['B' + str(row)] = config.data['ach']['account']
-
-    row = toRow
-    worksheet['D' + str(row)] = 'Remit To:'
-    worksheet['D' + str(row)].style = 'invoiceHeader'
-    worksheet['E' + str(row)] = config.data['remitTo']['line1']; row += 1
-    worksheet['E' + str(row)] = config.data['remitTo']['line2']; row += 1
-    worksheet['E' + str(row)] = config.data['remitTo']['line3']; row += 1
-    worksheet['E' + str(row)] = config.data['remitTo']['line4']; row += 1
-
-    row = instructionsRow
-    worksheet['D' + str(row)] = 'Invoice Questions:'
-    worksheet['D' + str(row)].style = 'invoiceHeader'
-    worksheet['E' + str(row)] = config.data['questions']['line1']; row += 1
-    worksheet['E' + str(row)] = config.data['questions']['line2']; row += 1
-    worksheet['E' + str(row)] = config.data['questions']['line3']; row += 1
-
-    row += 1
-    worksheet['A' + str(row)] = config.data['postHeaders']['clin']
-    worksheet['A' + str(row)].style = 'summaryTitle'
-    worksheet['B' + str(row)] = config.data['postHeaders']['description']
-    worksheet['B' + str(row)].style = 'summaryTitle'
-    worksheet['C' + str(row)] = config.data['postHeaders']['type']
-    worksheet['C' + str(row)].style = 'summaryTitle'
-    worksheet['D' + str(row)] = config.data['postHeaders']['quantity']
-    worksheet['D' + str(row)].style = 'summaryTitle'
-    worksheet['E' + str(row)] = config.data['postHeaders']['rate']
-    worksheet['E' + str(row)].style = 'summaryTitle'
-    worksheet['F' + str(row)] = config.data['postHeaders']['total']
-    worksheet['F' + str(row)].style = 'summaryTitle'
+    stampInvoiceHeader(worksheet, sheetInfo, 'postHeaders', config.data['paymentTerms']['line1'])
 
     # format the summary detail area
 
 def formatDetailTab(worksheet):
-    worksheet.delete_cols(1, 1)
-    worksheet.insert_rows(1, 1)
-
     styleColumn(worksheet, 'A', 'Name')
     styleColumn(worksheet, 'B', 'Date')
     styleColumn(worksheet, 'C', 'Location')
@@ -368,8 +348,7 @@ def formatDetailTab(worksheet):
 
     # add a fill for columns to show that they are are summary columns
     for column in ['N', 'O', 'P']:
-        for row in range(1, stop):
-            worksheet[column][row].fill = lightBlue
+        fillCells(columnCells(worksheet, column, 2, stop), lightBlue)
 
 def formatPostDetails(worksheet, title, startRow, detailRows, spaceToSummary = 2, summaryRows = 1):
     styleColumn(worksheet, 'A', 'City')
@@ -381,8 +360,7 @@ def formatPostDetails(worksheet, title, startRow, detailRows, spaceToSummary = 2
     styleColumn(worksheet, 'G', 'Post Rate')
     styleColumn(worksheet, 'H', 'Total')
 
-    logo = openpyxl.drawing.image.Image('logo-MEC.png')
-    worksheet.add_image(logo, 'A1')
+    worksheet.add_image(logoImage(), 'A1')
 
     worksheet.merge_cells('D2:H2')
     worksheet['D2'] = title
@@ -393,27 +371,20 @@ def formatPostDetails(worksheet, title, startRow, detailRows, spaceToSummary = 2
     stop = startRow + detailRows + 1
     sumColumn(worksheet, 'H', 'currency', startRow + 1, stop)
 
-    for column in ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H']:
-        worksheet[f'{column}{startRow + 1}'].style = 'summaryTitle'
-
-        for r in range(startRow, stop):
-            worksheet[column + str(r + 1)].border = Border(left=thinSide, top=thinSide, right=thinSide, bottom=thinSide)
+    styleRange(worksheet, f'A{startRow + 1}:H{startRow + 1}', style='summaryTitle')
+    styleRange(worksheet, f'A{startRow + 1}:H{stop}', border=thinBorder)
 
     start = startRow + detailRows + spaceToSummary
     stop = start + summaryRows
     sumColumn(worksheet, 'H', 'currency', start + 1, stop)
 
-    for column in ['F', 'G', 'H']:
-        worksheet[f'{column}{startRow + 1}'].style = 'summaryTitle'
-
-        for r in range(start, stop):
-            worksheet[column + str(r + 1)].border = Border(left=thinSide, top=thinSide, right=thinSide, bottom=thinSide)
+    styleRange(worksheet, f'F{startRow + 1}:H{startRow + 1}', style='summaryTitle')
+    styleRange(worksheet, f'F{start + 1}:H{stop}', border=thinBorder)
 
     worksheet.page_setup.orientation = worksheet.ORIENTATION_LANDSCAPE
 
 def formatHoursTab(worksheet, approvers=None, locationName=None, billingFrom=None):
     aboveRows = 3
-    worksheet.insert_rows(1, aboveRows)
 
     styleColumn(worksheet, 'A', 'City')
     styleColumn(worksheet, 'B', 'SubCLIN')
@@ -440,14 +411,10 @@ def formatHoursTab(worksheet, approvers=None, locationName=None, billingFrom=Non
     sumColumn(worksheet, 'J', 'number', start, stop)
     sumColumn(worksheet, 'K', 'number', start, stop)
 
-    logo = openpyxl.drawing.image.Image('logo-MEC.png')
-    worksheet.add_image(logo, 'A1')
-
-    for column in ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K']:
-        worksheet[column + str(start - 1)].style = 'summaryTitle'
+    worksheet.add_image(logoImage(), 'A1')
 
-        for r in range(start - 2, stop):
-            worksheet[column + str(r + 1)].border = Border(left=thinSide, top=thinSide, right=thinSide, bottom=thinSide)
+    styleRange(worksheet, f'A{start - 1}:K{start - 1}', style='summaryTitle')
+    styleRange(worksheet, f'A{start - 1}:K{stop}', border=thinBorder)
 
     signaturesRow = worksheet.max_row + 2
     worksheet.merge_cells(f'B{signaturesRow}:E{signaturesRow}')
@@ -492,7 +459,6 @@ def formatHoursTab(worksheet, approvers=None, locationName=None, billingFrom=Non
 
 def formatHoursDetailsTab(worksheet, locationName=None, invoiceNumber=None, billingFrom=None):
     aboveRows = 3
-    worksheet.insert_rows(1, aboveRows)
 
     styleColumn(worksheet, 'A', 'Date')
     styleColumn(worksheet, 'B', 'Name')
@@ -518,14 +484,10 @@ def formatHoursDetailsTab(worksheet, locationName=None, invoiceNumber=None, bill
     sumColumn(worksheet, 'I', 'number', start, stop)
     sumColumn(worksheet, 'J', 'number', start, stop)
 
-    logo = openpyxl.drawing.image.Image('logo-MEC.png')
-    worksheet.add_image(logo, 'A1')
+    worksheet.add_image(logoImage(), 'A1')
 
-    for column in ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J']:
-        worksheet[column + str(start - 1)].style = 'summaryTitle'
-
-        for r in range(start - 2, stop):
-            worksheet[column + str(r + 1)].border = Border(left=thinSide, top=thinSide, right=thinSide, bottom=thinSide)
+    styleRange(worksheet, f'A{start - 1}:J{start - 1}', style='summaryTitle')
+    styleRange(worksheet, f'A{start - 1}:J{stop}', border=thinBorder)
 
     worksheet['G1'] = 'Report Date:'
     worksheet['H1'] = processingDate
@@ -547,9 +509,6 @@ def formatHoursDetailsTab(worksheet, locationName=None, invoiceNumber=None, bill
     worksheet.page_setup.orientation = worksheet.ORIENTATION_LANDSCAPE
 
 def formatFullDetailsTab(worksheet):
-    worksheet.delete_cols(1, 1)
-    worksheet.insert_rows(1, 1)
-
     styleColumn(worksheet, 'A', 'CLIN')
     styleColumn(worksheet, 'B', 'Location')
     styleColumn(worksheet, 'C', 'City')
@@ -603,19 +562,14 @@ def formatFullDetailsTab(worksheet):
     sumColumn(worksheet, 'V', 'currency', start, stop, top=True)
 
 def formatSummaryTab(worksheet):
-    worksheet.delete_cols(1, 1)
-
     styleColumn(worksheet, 'A', 'Filename')
     styleColumn(worksheet, 'B', 'Type')
     styleColumn(worksheet, 'C', 'InvoiceNumber')
     styleColumn(worksheet, 'D', 'TaskOrder')
     styleColumn(worksheet, 'E', 'Total')
 
-    for column in ['A', 'B', 'C', 'D', 'E']:
-        worksheet[column + '1'].style = 'summaryTitle'
-
-        for r in range(1, worksheet.max_row + 1):
-                worksheet[column + str(r)].border = Border(left=thinSide, top=thinSide, right=thinSide, bottom=thinSide)
+    styleRange(worksheet, 'A1:E1', style='summaryTitle')
+    styleRange(worksheet, f'A1:E{worksheet.max_row}', border=thinBorder)
 
     # add SUM() formulas
     start = 2
@@ -623,8 +577,6 @@ def formatSummaryTab(worksheet):
     sumColumn(worksheet, 'E', 'currency', start, stop)
 
 def formatDaysTab(worksheet):
-    worksheet.insert_rows(1, 1)
-
     styleColumn(worksheet, 'A', 'Date')
     styleColumn(worksheet, 'B', 'Name')
     styleColumn(worksheet, 'C', 'Task Name')
@@ -651,8 +603,6 @@ def formatDaysTab(worksheet):
             worksheet[f'E{row}'].fill = yellow
 
 def formatEmployeesTab(worksheet):
-    worksheet.insert_rows(1, 1)
-
     styleColumn(worksheet, 'A', 'Name')
     styleColumn(worksheet, 'B', 'Regular')
     styleColumn(worksheet, 'C', 'Regular')
@@ -677,8 +627,6 @@ def formatEmployeesTab(worksheet):
             worksheet[f'C{row}'].fill = yellow 
     
 def formatTasksTab(worksheet):
-    worksheet.insert_rows(1, 1)
-    
 
     maxColumns = worksheet.max_column
     # print(f'maxColumns: {maxColumns}, {get_column_letter(maxColumns)}')
@@ -743,8 +691,6 @@ def formatActivityDataTab(worksheet):
     # worksheet.freeze_panes = worksheet['A2']
 
 def formatDebugTab(worksheet):
-    worksheet.insert_rows(1, 1)
-
     styleColumn(worksheet, 'A', 'Name')
     styleColumn(worksheet, 'B', 'Hours')
     styleColumn(worksheet, 'C', 'Hours')
@@ -781,8 +727,6 @@ def formatDebugTab(worksheet):
     sumColumn(worksheet, 'M', 'number', start, stop, top=True)
 
 def formatPivotTab(worksheet):
-    worksheet.insert_rows(1, 1)
-
     styleColumn(worksheet, 'A', 'Date')
     styleColumn(worksheet, 'B', 'Name')
     styleColumn(worksheet, 'C', 'Hours')
@@ -816,8 +760,6 @@ def formatPivotTab(worksheet):
     sumColumn(worksheet, 'L', 'number', start, stop, top=True)
 
 def formatJoinedPivotTab(worksheet, taskOffset):
-    worksheet.insert_rows(1, 1)
-
     styleColumn(worksheet, 'A', 'Date')
     styleColumn(worksheet, 'B', 'Name')
 
@@ -907,8 +849,6 @@ def formatJoinedPivotTab(worksheet, taskOffset):
     # worksheet['A1'].style = 'numberCellTotal'
 
 def formatDiffsTab(worksheet):
-    worksheet.insert_rows(1, 1)
-
     styleColumn(worksheet, 'A', 'Date')
     styleColumn(worksheet, 'B', 'Name')
     styleColumn(worksheet, 'C', 'Task Name')
@@ -934,30 +874,29 @@ def formatDiffsTab(worksheet):
             worksheet[f'D{row}'].fill = yellow
             worksheet[f'E{row}'].fill = yellow
 
-def highlightDiffs(worksheet1, worksheet2) -> bool:
-    rows1 = worksheet1.max_row
-    rows2 = worksheet2.max_row
+def highlightCells(worksheet, coordinates, fill = yellow):
+    fillCells([worksheet.cell(row=row, column=column) for row, column in coordinates], fill)
+
+def highlightDiffs(worksheet1, worksheet2, keys = None, headerRow = 1) -> bool:
+    # the values are compared as DataFrames and only the differing cells are touched,
+    # with keys the rows are matched on those header columns instead of by position
     cols1 = worksheet1.max_column
     cols2 = worksheet2.max_column
 
-    rows = max(rows1, rows2)
-
-    if cols1 != cols2:
+    if keys is None and cols1 != cols2:
         print('\n\n\nThe two tabs do not have the same number of columns!')
         print(f'cols1: {cols1}, cols2: {cols2}')
         return False
-    
-    for row in range(1, rows):
-        for col in range(1, cols1 + 1):
-            if worksheet1.cell(row=row, column=col).value != worksheet2.cell(row=row, column=col).value:
-                worksheet1.cell(row=row, column=col).fill = yellow
-                worksheet2.cell(row=row, column=col).fill = yellow
-    
+
+    from WorkbookDiff import diffSheets
+
+    coordinates1, coordinates2 = diffSheets(worksheet1, worksheet2, keys, headerRow)
+    highlightCells(worksheet1, coordinates1)
+    highlightCells(worksheet2, coordinates2)
+
     return True
 
 def formatJoinTab(worksheet):
-    worksheet.insert_rows(1, 1)
-
     styleColumn(worksheet, 'A', 'Date')
     styleColumn(worksheet, 'B', 'Hours')
     styleColumn(worksheet, 'C', 'Hours')
@@ -982,8 +921,6 @@ def formatJoinTab(worksheet):
             worksheet[f'C{row}'].fill = yellow
 
 def formatTimeByDate(worksheet):
-    worksheet.insert_rows(1, 1)
-
     styleColumn(worksheet, 'A', 'Date')
     styleColumn(worksheet, 'B', 'Name')
     styleColumn(worksheet, 'C', 'SubCLIN')
@@ -1024,31 +961,30 @@ def formatTimeByDate(worksheet):
     sumColumn(worksheet, 'P', 'number', start, stop, top=True)
     sumColumn(worksheet, 'Q', 'number', start, stop, top=True)
 
+    # max_column scans every cell so it is looked up once rather than per highlighted row
+    colStop = worksheet.max_column + 1
+
     for row in range(3, stop + 1):
         if worksheet[f'D{row}'].value == "Approved":
             pass
         elif worksheet[f'D{row}'].value == "Submitted":
-            highlightRow(worksheet, row, color=yellow)
+            highlightRow(worksheet, row, color=yellow, colStop=colStop)
         elif worksheet[f'D{row}'].value == "Draft":
-            highlightRow(worksheet, row, color=gray) 
+            highlightRow(worksheet, row, color=gray, colStop=colStop) 
         elif worksheet[f'D{row}'].value == "Declined":
-            highlightRow(worksheet, row, color=orange)  
+            highlightRow(worksheet, row, color=orange, colStop=colStop)  
         else:
-            highlightRow(worksheet, row)
+            highlightRow(worksheet, row, colStop=colStop)
 
     # add a fill for columns that are non-billable
     for column in ['H', 'I', 'J']:
-        for row in range(1, stop):
-            worksheet[column][row].fill = gray
+        fillCells(columnCells(worksheet, column, 2, stop), gray)
 
     # add a fill for columns to show that they are are summary columns
     for column in ['O', 'P', 'Q']:
-        for row in range(1, stop):
-            worksheet[column][row].fill = lightBlue
+        fillCells(columnCells(worksheet, column, 2, stop), lightBlue)
 
 def formatTimeByEmployee(worksheet):
-    worksheet.insert_rows(1, 1)
-
     styleColumn(worksheet, 'A', 'City')
     styleColumn(worksheet, 'B', 'SubCLIN')
     styleColumn(worksheet, 'C', 'Name')
@@ -1089,26 +1025,27 @@ def formatTimeByEmployee(worksheet):
     sumColumn(worksheet, 'P', 'number', start, stop, top=True)
     sumColumn(worksheet, 'Q', 'number', start, stop, top=True)
 
+    # max_column scans every cell so it is looked up once rather than per highlighted row
+    colStop = worksheet.max_column + 1
+
     for row in range(3, stop + 1):
         if worksheet[f'D{row}'].value == "Approved":
             pass
         elif worksheet[f'D{row}'].value == "Submitted":
-            highlightRow(worksheet, row, color=yellow)
+            highlightRow(worksheet, row, color=yellow, colStop=colStop)
         elif worksheet[f'D{row}'].value == "Draft":
-            highlightRow(worksheet, row, color=gray)
+            highlightRow(worksheet, row, color=gray, colStop=colStop)
         elif worksheet[f'D{row}'].value == "Declined":
-            highlightRow(worksheet, row, color=orange)  
+            highlightRow(worksheet, row, color=orange, colStop=colStop)  
         else:
-            highlightRow(worksheet, row)
+            highlightRow(worksheet, row, colStop=colStop)
 
     # add a fill for columns that are non-billable
     for column in ['H', 'I', 'J']:
-        for row in range(1, stop):
-            worksheet[column][row].fill = gray
+        fillCells(columnCells(worksheet, column, 2, stop), gray)
     # add a fill for columns to show that they are are summary columns
     for column in ['O', 'P', 'Q']:
-        for row in range(1, stop):
-            worksheet[column][row].fill = lightBlue
+        fillCells(columnCells(worksheet, column, 2, stop), lightBlue)
 
 def formatEmployeeInfo(worksheet):
     styleColumn(worksheet, 'A', 'Name')
@@ -1132,5 +1069,4 @@ def formatEmployeeInfo(worksheet):
     worksheet.add_table(table)
     worksheet.freeze_panes = worksheet['A2']
 
-    for column in ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M', 'N', 'O']:
-        worksheet[f'{column}1'].style = 'summaryTitle'
\ No newline at end of file
+    styleRange(worksheet, 'A1:O1', style='summaryTitle')
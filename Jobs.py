@@ -0,0 +1,47 @@
+# Runs workbook jobs either in this process or fanned out across a process pool.
+# A job is a (function, arguments) pair that is called as function(labor, *arguments).
+
+sharedLabor = None	# the LaborData each pool worker receives once at startup
+
+def initWorker(labor):
+	global sharedLabor
+	sharedLabor = labor
+
+def callWithLabor(function, arguments):
+	return function(sharedLabor, *arguments)
+
+def runJobs(labor, jobList, jobs=1) -> list:
+	# results are returned in the order of jobList regardless of which job finishes first
+	if jobs <= 1 or len(jobList) <= 1:
+		return [function(labor, *arguments) for function, arguments in jobList]
+
+	from concurrent.futures import ProcessPoolExecutor
+
+	with ProcessPoolExecutor(max_workers=jobs, initializer=initWorker, initargs=(labor,)) as executor:
+		futures = [executor.submit(callWithLabor, function, arguments) for function, arguments in jobList]
+		return [future.result() for future in futures]
+
+def parseJobs(arguments, default=1) -> tuple:
+	# pulls "--jobs N" out of a command line, returning the job count and the remaining arguments
+	jobs = default
+	remaining = []
+	index = 0
+
+	while index < len(arguments):
+		if arguments[index] == '--jobs' and index + 1 < len(arguments):
+			jobs = int(arguments[index + 1])
+			index += 2
+		elif arguments[index].startswith('--jobs='):
+			jobs = int(arguments[index].split('=', 1)[1])
+			index += 1
+		else:
+			remaining.append(arguments[index])
+			index += 1
+
+	return jobs, remaining
+
+def parseNoCache(arguments) -> tuple:
+	# pulls "--no-cache" out of a command line, returning whether the cached copies of the input files
+	# can be used and the remaining arguments
+	remaining = [argument for argument in arguments if argument != '--no-cache']
+	return len(remaining) == len(arguments), remaining
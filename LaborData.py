@@ -7,6 +7,16 @@ from EmployeeTime import EmployeeTime
 from EmployeeInfo import EmployeeInfo
 from BillingRates import BillingRates
 from Allowances import Allowances
+from ActivityCache import ActivityCache
+from Config import ConfigFile
+
+# every file that goes into the joined activity data
+ReferenceFiles = [
+	'data/BillingRates.xlsx',
+	'data/EmployeeInfo.xlsx',
+	'data/AllowanceRates.csv',
+	ConfigFile
+]
 
 # TERMINOLOGY:
 # CLIN: The identifier for the region (e.g. "CLIN 001")
@@ -156,16 +166,31 @@ class LaborData:
 			self.invoiceData[clin] = invoiceData
 
 	@classmethod
-	def fromReportFile(cls, filename: str) -> 'LaborData':
+	def fromReportFile(cls, filename: str, fast=False, engine=None, useCache=True) -> 'LaborData':
 		print(f'Creating labor data from {filename}')
-		time = EmployeeTime(filename=filename)
+
+		# the joined data only depends on the input files, so reuse it while none of them change
+		cache = ActivityCache(verbose=True)
+		key = cache.key([filename] + ReferenceFiles)
+
+		if useCache:
+			entry = cache.load(key)
+
+			if entry is not None:
+				return cls(EmployeeTime.fromJoinedData(*entry))
+
+		time = EmployeeTime(filename=filename, fast=fast, engine=engine)
 		effectiveDate = time.dateEnd
-		allowances = Allowances(effectiveDate=effectiveDate)
-		billingRates = BillingRates(effectiveDate=effectiveDate)
+		allowances = Allowances(effectiveDate=effectiveDate, useCache=useCache)
+		billingRates = BillingRates(effectiveDate=effectiveDate, useCache=useCache)
 		billingRates.joinWith(allowances)
-		employees = EmployeeInfo()
+		employees = EmployeeInfo(useCache=useCache)
 		employees.joinWith(billingRates)
-		time.joinWith(employees)
+		time.joinWith(employees, billingRates, allowances)
+
+		if useCache:
+			cache.save(key, time.data, time.unjoined)
+
 		return cls(time)
 
 if __name__ == '__main__':
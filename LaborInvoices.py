@@ -1,26 +1,15 @@
 #!/usr/local/bin/python
-import pandas as pd
-from openpyxl import load_workbook
+from Config import getConfig
+from Jobs import runJobs, parseJobs, parseNoCache
 
-from Config import Config
-from LaborData import LaborData
-
-from InvoiceStyles import styles
-from InvoiceFormat import formatInvoiceTab
-
-config = Config()
-Regions = {}
-
-versionString = f'v{config.data["version"]}'
-CountryApprovers = config.data['approvers']
-
-# get region dictionary from config and swap keys and values
-# to make it easy to look up the region name from the CLIN
-for region in config.data['regions']:
-	Regions[config.data['regions'][region]] = region
+# pandas, the labor data and the openpyxl formatting are imported where they are used,
+# so printing the usage does not load them
+config = getConfig()
 
 # construct a summary dataframe for writing into the file
-def summaryDataframe(description:str, hours:float, amount:float) -> pd.DataFrame:
+def summaryDataframe(description:str, hours:float, amount:float) -> 'pd.DataFrame':
+	import pandas as pd
+
 	data = {
 		'blank1': '',
 		'Description': description,
@@ -32,71 +21,75 @@ def summaryDataframe(description:str, hours:float, amount:float) -> pd.DataFrame
 
 	return pd.DataFrame(data, index=[0])
 
-if __name__ == '__main__':
-	import sys
+def invoiceLocations(labor: 'LaborData', clin: str) -> list:
+	# the locations in a CLIN that get a labor invoice, in the order they are numbered
+	locationInfo = labor.time.locationsByCLIN()
+	invoiceData = labor.invoiceData[clin]
 
-	if len(sys.argv) < 2:
-		print(f'Usage: {sys.argv[0]} <billing activity file>')
-		sys.exit(1)
-
-	filename = sys.argv[1]
+	return [
+		locationName for locationName in sorted(invoiceData.locationDetails.keys())
+		if locationName in locationInfo[clin] and locationName != 'Unknown'
+	]
 
-	labor = LaborData.fromReportFile(filename)
+def writeLaborInvoice(labor: 'LaborData', clin: str, invoiceNumberValue: int) -> str:
 	time = labor.time
 
 	startYear = time.startYear()
 	startMonth = time.startMonthName()
 	locationInfo = time.locationsByCLIN()
-	invoiceNumberValue = config.data['nextInvoiceNumber']
-
-	for clin in locationInfo.keys():
-		region = Regions[clin]
-		invoiceData = labor.invoiceData[clin]
-
-		prefix = config.data['filenamePrefixes']['laborInvoices']
-		pattern = f'{prefix}-{region}-{startYear}-{startMonth}'
-		outputFile = f'{pattern}.xlsx'
-
-		sheetInfo = {}
-
-		with pd.ExcelWriter(outputFile) as writer:
-			for locationName in sorted(invoiceData.locationDetails.keys()):
-				if locationName not in locationInfo[clin] or locationName == 'Unknown':
-					print(f'\n----------\nWarning: {locationName} is not in the locationInfo dictionary\n----------\n')
-					continue
-
-				locationData = invoiceData.locationDetails[locationName]
-				sheetName = f'Labor-{locationName}'
-				summaryStartRow = 22
-				rowsToSum = []
-
-				for item in locationData.laborDetails:
-					item.to_excel(writer, sheet_name=sheetName, startrow=summaryStartRow, startcol=0, header=False)
-					rowsToSum.append((summaryStartRow + 1, summaryStartRow + len(item)))
-					summaryStartRow += len(item) + 2
-
-				summary = summaryDataframe(f'Totals for {locationName}', locationData.laborHours, locationData.laborAmount)
-				summary.to_excel(writer, sheet_name=sheetName, startrow=summaryStartRow, startcol=0, header=False)
-
-				invoiceNumber = f'SD-{invoiceNumberValue:04d}'
-				invoiceNumberValue += 1
-				billingPeriod = time.billingPeriod()
-
-				invoiceDetail = {
-					'description': f'{time.dateStart.strftime("%B")} {startYear}',
-					'region': locationName,
-					'filename': outputFile,
-					'type': 'Labor',
-					'invoiceNumber': invoiceNumber,
-					'taskOrder': f'Labor-{locationName}',
-					'billingPeriod': billingPeriod,
-					'invoiceAmount': summary['Amount'].sum(),
-					'rowsToSum': rowsToSum
-				}
-
-				sheetInfo[sheetName] = invoiceDetail
-		
-		workbook = load_workbook(outputFile)
+
+	region = config.regionsByCLIN()[clin]
+	invoiceData = labor.invoiceData[clin]
+
+	prefix = config.data['filenamePrefixes']['laborInvoices']
+	pattern = f'{prefix}-{region}-{startYear}-{startMonth}'
+	outputFile = f'{pattern}.xlsx'
+
+	sheetInfo = {}
+
+	import pandas as pd
+	from InvoiceStyles import styles
+	from InvoiceFormat import formatInvoiceTab
+
+	# the workbook is formatted in memory and written once when the writer closes
+	with pd.ExcelWriter(outputFile, engine='openpyxl') as writer:
+		for locationName in sorted(invoiceData.locationDetails.keys()):
+			if locationName not in locationInfo[clin] or locationName == 'Unknown':
+				print(f'\n----------\nWarning: {locationName} is not in the locationInfo dictionary\n----------\n')
+				continue
+
+			locationData = invoiceData.locationDetails[locationName]
+			sheetName = f'Labor-{locationName}'
+			summaryStartRow = 22
+			rowsToSum = []
+
+			for item in locationData.laborDetails:
+				item.to_excel(writer, sheet_name=sheetName, startrow=summaryStartRow, startcol=0, header=False, index=False)
+				rowsToSum.append((summaryStartRow + 1, summaryStartRow + len(item)))
+				summaryStartRow += len(item) + 2
+
+			summary = summaryDataframe(f'Totals for {locationName}', locationData.laborHours, locationData.laborAmount)
+			summary.to_excel(writer, sheet_name=sheetName, startrow=summaryStartRow, startcol=0, header=False, index=False)
+
+			invoiceNumber = f'SD-{invoiceNumberValue:04d}'
+			invoiceNumberValue += 1
+			billingPeriod = time.billingPeriod()
+
+			invoiceDetail = {
+				'description': f'{time.dateStart.strftime("%B")} {startYear}',
+				'region': locationName,
+				'filename': outputFile,
+				'type': 'Labor',
+				'invoiceNumber': invoiceNumber,
+				'taskOrder': f'Labor-{locationName}',
+				'billingPeriod': billingPeriod,
+				'invoiceAmount': summary['Amount'].sum(),
+				'rowsToSum': rowsToSum
+			}
+
+			sheetInfo[sheetName] = invoiceDetail
+	
+		workbook = writer.book
 
 		for styleName in styles.keys():
 			workbook.add_named_style(styles[styleName])
@@ -106,4 +99,42 @@ if __name__ == '__main__':
 			info = sheetInfo[key]
 			formatInvoiceTab(worksheet, info)
 
-		workbook.save(outputFile)
\ No newline at end of file
+	return outputFile
+
+def laborInvoiceCount(labor: 'LaborData') -> int:
+	# the invoice numbers laborJobs hands out
+	return sum(len(invoiceLocations(labor, clin)) for clin in labor.time.locationsByCLIN().keys())
+
+def laborJobs(labor: 'LaborData', invoiceNumberValue: int = None) -> list:
+	if invoiceNumberValue is None:
+		invoiceNumberValue = config.data['nextInvoiceNumber']
+
+	# invoice numbers are handed out up front so the workbooks do not depend on the order they are written
+	jobList = []
+
+	for clin in labor.time.locationsByCLIN().keys():
+		jobList.append((writeLaborInvoice, (clin, invoiceNumberValue)))
+		invoiceNumberValue += len(invoiceLocations(labor, clin))
+
+	return jobList
+
+def writeLaborInvoices(labor: 'LaborData', invoiceNumberValue: int = None, jobs=1) -> list:
+	return runJobs(labor, laborJobs(labor, invoiceNumberValue), jobs)
+
+if __name__ == '__main__':
+	import sys
+
+	jobs, arguments = parseJobs(sys.argv[1:])
+
+	useCache, arguments = parseNoCache(arguments)
+
+	if len(arguments) < 1:
+		print(f'Usage: {sys.argv[0]} [--jobs N] [--no-cache] <billing activity file>')
+		sys.exit(1)
+
+	filename = arguments[0]
+
+	from LaborData import LaborData
+
+	labor = LaborData.fromReportFile(filename, useCache=useCache)
+	writeLaborInvoices(labor, jobs=jobs)
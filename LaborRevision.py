@@ -1,27 +1,15 @@
 #!/usr/local/bin/python
-import pandas as pd
-from openpyxl import load_workbook
-from itertools import repeat
+from Config import getConfig
+from Jobs import parseNoCache
 
-from Config import Config
-from LaborData import LaborData
-
-from InvoiceStyles import styles
-from InvoiceFormat import formatInvoiceTab
-
-config = Config()
-Regions = {}
-
-versionString = f'v{config.data["version"]}'
-CountryApprovers = config.data['approvers']
-
-# get region dictionary from config and swap keys and values
-# to make it easy to look up the region name from the CLIN
-for region in config.data['regions']:
-	Regions[config.data['regions'][region]] = region
+# pandas, the labor data and the openpyxl formatting are imported where they are used,
+# so printing the usage does not load them
+config = getConfig()
 
 # construct a summary dataframe for writing into the file
-def summaryDataframe(description:str, hours:float, amount:float) -> pd.DataFrame:
+def summaryDataframe(description:str, hours:float, amount:float) -> 'pd.DataFrame':
+	import pandas as pd
+
 	data = {
 		'blank1': '',
 		'Description': description,
@@ -36,13 +24,15 @@ def summaryDataframe(description:str, hours:float, amount:float) -> pd.DataFrame
 if __name__ == '__main__':
 	import sys
 
-	if len(sys.argv) < 4:
-		print(f'Usage: {sys.argv[0]} <countryName> <invoiceNumber> <billing activity file>')
+	useCache, arguments = parseNoCache(sys.argv[1:])
+
+	if len(arguments) < 3:
+		print(f'Usage: {sys.argv[0]} [--no-cache] <countryName> <invoiceNumber> <billing activity file>')
 		sys.exit(1)
 
-	countryName = sys.argv[1]
-	invoiceNumberInput = sys.argv[2]	# this is the number part, although it can have an R if a revision of a revision
-	filename = sys.argv[3]
+	countryName = arguments[0]
+	invoiceNumberInput = arguments[1]	# this is the number part, although it can have an R if a revision of a revision
+	filename = arguments[2]
 
 	# the invoiceNumberValue is the number part of the invoice number (before any R suffix)
 	try:
@@ -61,7 +51,9 @@ if __name__ == '__main__':
 	print(f'This is revision: {revisionCount}')
 	print(f'Invoice Number: {invoiceNumber}')
 
-	labor = LaborData.fromReportFile(filename)
+	from LaborData import LaborData
+
+	labor = LaborData.fromReportFile(filename, useCache=useCache)
 	time = labor.time
 
 	startYear = time.startYear()
@@ -89,18 +81,23 @@ if __name__ == '__main__':
 
 	sheetInfo = {}
 
-	with pd.ExcelWriter(outputFile) as writer:
+	import pandas as pd
+	from InvoiceStyles import styles
+	from InvoiceFormat import formatInvoiceTab
+
+	# the workbook is formatted in memory and written once when the writer closes
+	with pd.ExcelWriter(outputFile, engine='openpyxl') as writer:
 		sheetName = f'Labor-{countryName}'
 		summaryStartRow = 22
 		rowsToSum = []
 
 		for item in locationData.laborDetails:
-			item.to_excel(writer, sheet_name=sheetName, startrow=summaryStartRow, startcol=0, header=False)
+			item.to_excel(writer, sheet_name=sheetName, startrow=summaryStartRow, startcol=0, header=False, index=False)
 			rowsToSum.append((summaryStartRow + 1, summaryStartRow + len(item)))
 			summaryStartRow += len(item) + 2
 
 		summary = summaryDataframe(f'Totals for {countryName}', locationData.laborHours, locationData.laborAmount)
-		summary.to_excel(writer, sheet_name=sheetName, startrow=summaryStartRow, startcol=0, header=False)
+		summary.to_excel(writer, sheet_name=sheetName, startrow=summaryStartRow, startcol=0, header=False, index=False)
 
 		# DO NOT increment since we are only handling a single invoice invoiceNumberValue += 1
 		billingPeriod = time.billingPeriod()
@@ -119,14 +116,12 @@ if __name__ == '__main__':
 
 		sheetInfo[sheetName] = invoiceDetail
 	
-	workbook = load_workbook(outputFile)
-
-	for styleName in styles.keys():
-		workbook.add_named_style(styles[styleName])
+		workbook = writer.book
 
-	for key in sheetInfo.keys():
-		worksheet = workbook[key]
-		info = sheetInfo[key]
-		formatInvoiceTab(worksheet, info)
+		for styleName in styles.keys():
+			workbook.add_named_style(styles[styleName])
 
-	workbook.save(outputFile)
\ No newline at end of file
+		for key in sheetInfo.keys():
+			worksheet = workbook[key]
+			info = sheetInfo[key]
+			formatInvoiceTab(worksheet, info)
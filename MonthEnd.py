@@ -0,0 +1,100 @@
+#!/usr/local/bin/python
+# Generates every Status, Approvals, Labor and Post workbook from a single load of the activity data
+import time as timer
+
+from Config import getConfig
+from Jobs import runJobs, parseJobs, parseNoCache
+
+from Status import statusJobs
+from Approvals import approvalsJobs
+from LaborInvoices import laborJobs, laborInvoiceCount
+from PostInvoices import postJobs, postInvoiceCount
+
+Stages = {
+	'Status': statusJobs,
+	'Approvals': approvalsJobs,
+	'Labor': laborJobs,
+	'Post': postJobs
+}
+
+# stages that can write their workbooks with the constant memory XlsxWriter backend
+StreamingStages = ['Status', 'Approvals']
+
+# stages that number their invoices, each one starts after the numbers the stages before it used
+InvoiceCounts = {
+	'Labor': laborInvoiceCount,
+	'Post': postInvoiceCount
+}
+
+def timedJob(labor: 'LaborData', function, arguments) -> tuple:
+	start = timer.perf_counter()
+	result = function(labor, *arguments)
+	return result, timer.perf_counter() - start
+
+if __name__ == '__main__':
+	import sys
+
+	jobs, arguments = parseJobs(sys.argv[1:])
+
+	streaming = '--streaming' in arguments
+	arguments = [argument for argument in arguments if argument != '--streaming']
+
+	useCache, arguments = parseNoCache(arguments)
+
+	if len(arguments) < 1:
+		print(f'Usage: {sys.argv[0]} [--jobs N] [--no-cache] [--streaming] <billing activity file> [stage ...]')
+		print(f'Stages: {", ".join(Stages.keys())} (default: all)')
+		sys.exit(1)
+
+	filename = arguments[0]
+	stageNames = arguments[1:] if len(arguments) > 1 else list(Stages.keys())
+
+	for stageName in stageNames:
+		if stageName not in Stages:
+			print(f'Error: "{stageName}" is not a valid stage')
+			print(f'Available stages are: {", ".join(Stages.keys())}')
+			sys.exit(1)
+
+	# the labor data pulls in pandas, so it is only imported once there is a file to load
+	from LaborData import LaborData
+
+	start = timer.perf_counter()
+	labor = LaborData.fromReportFile(filename, useCache=useCache)
+	loadSeconds = timer.perf_counter() - start
+
+	# every workbook of every stage is a separate job so they can all share one pool
+	jobList = []
+	jobStages = []
+	invoiceNumberValue = getConfig().data['nextInvoiceNumber']
+
+	for stageName in stageNames:
+		if streaming and stageName in StreamingStages:
+			stageJobs = Stages[stageName](labor, streaming=True)
+		elif stageName in InvoiceCounts:
+			stageJobs = Stages[stageName](labor, invoiceNumberValue)
+			invoiceNumberValue += InvoiceCounts[stageName](labor)
+		else:
+			stageJobs = Stages[stageName](labor)
+
+		for function, jobArguments in stageJobs:
+			jobList.append((timedJob, (function, jobArguments)))
+			jobStages.append(stageName)
+
+	start = timer.perf_counter()
+	results = runJobs(labor, jobList, jobs)
+	writeSeconds = timer.perf_counter() - start
+
+	timings = {stageName: 0 for stageName in stageNames}
+
+	for stageName, (outputFile, seconds) in zip(jobStages, results):
+		timings[stageName] += seconds
+
+	print(f'\nCreated {len(results)} workbooks:')
+	for outputFile, seconds in results:
+		print(f'  {outputFile}')
+
+	print(f'\nTiming{" (stages summed across " + str(jobs) + " jobs)" if jobs > 1 else ""}:')
+	print(f'  {"Load":<10} {loadSeconds:8.2f}s')
+	for stageName, seconds in timings.items():
+		print(f'  {stageName:<10} {seconds:8.2f}s')
+	print(f'  {"Total":<10} {loadSeconds + writeSeconds:8.2f}s')
@@ -0,0 +1,87 @@
+# Keeps the allowance pages fetched from the State Department website in a SQLite database,
+# keyed by country, post and effective date. The page for a past effective date never changes
+# so it is kept for good once it has the rates table, the page with the current rates and a page
+# that came back without the table are fetched again once they are older than maxAge.
+import os
+import sqlite3
+import time as timer
+from contextlib import closing
+
+CurrentPageAge = 12 * 60 * 60	# seconds the current rates page is served from the cache
+
+class PageCache:
+	def __init__(self, filename=None, maxAge=CurrentPageAge, verbose=False):
+		self.filename = filename if filename is not None else 'cache/allowances.sqlite'
+		self.maxAge = maxAge
+		self.verbose = verbose
+
+	def connect(self):
+		os.makedirs(os.path.dirname(self.filename) or '.', exist_ok=True)
+
+		db = sqlite3.connect(self.filename, timeout=60)
+		db.execute('''
+			CREATE TABLE IF NOT EXISTS pages (
+				countryCode TEXT NOT NULL,
+				postCode TEXT NOT NULL,
+				effectiveDate TEXT NOT NULL,
+				fetched REAL NOT NULL,
+				content BLOB NOT NULL,
+				complete INTEGER NOT NULL DEFAULT 0,
+				PRIMARY KEY (countryCode, postCode, effectiveDate)
+			)
+		''')
+
+		# pages saved before the complete flag are checked again once they are past maxAge
+		if 'complete' not in [column[1] for column in db.execute('PRAGMA table_info(pages)')]:
+			with db:
+				db.execute('ALTER TABLE pages ADD COLUMN complete INTEGER NOT NULL DEFAULT 0')
+
+		return db
+
+	def columns(self, key: tuple) -> tuple:
+		# the current page has no effective date, it is stored under an empty one
+		countryCode, postCode, effectiveDate = key
+		return str(countryCode), str(postCode), effectiveDate if effectiveDate is not None else ''
+
+	def get(self, keys, stale=False) -> dict:
+		# the stored pages for keys of (countryCode, postCode, effectiveDate),
+		# stale=True also returns a page that is past maxAge
+		pages = {}
+		oldest = timer.time() - self.maxAge
+
+		with closing(self.connect()) as db:
+			for key in keys:
+				found = db.execute(
+					'SELECT fetched, content, complete FROM pages WHERE countryCode = ? AND postCode = ? AND effectiveDate = ?',
+					self.columns(key)
+				).fetchone()
+
+				if found is None:
+					continue
+
+				fetched, content, complete = found
+
+				if (key[2] is None or not complete) and fetched < oldest and not stale:
+					continue
+
+				pages[key] = content
+
+		if self.verbose:
+			print(f'Found {len(pages)} of {len(keys)} pages in {self.filename}')
+
+		return pages
+
+	def put(self, pages: dict):
+		# pages maps each key to (content, complete), complete pages for a past date are kept for good
+		fetched = timer.time()
+
+		with closing(self.connect()) as db:
+			with db:
+				db.executemany(
+					'INSERT OR REPLACE INTO pages (countryCode, postCode, effectiveDate, fetched, content, complete) VALUES (?, ?, ?, ?, ?, ?)',
+					[(*self.columns(key), fetched, content, int(complete)) for key, (content, complete) in pages.items()]
+				)
+
+		if self.verbose:
+			print(f'Saved {len(pages)} pages to {self.filename}')
+
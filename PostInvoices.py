@@ -1,26 +1,15 @@
 #!/usr/local/bin/python
-import pandas as pd
-from openpyxl import load_workbook
+from Config import getConfig
+from Jobs import runJobs, parseJobs, parseNoCache
 
-from Config import Config
-from LaborData import LaborData
-
-from InvoiceStyles import styles
-from InvoiceFormat import formatCostsTab, formatPostDetails
-
-config = Config()
-Regions = {}
-
-versionString = f'v{config.data["version"]}'
-CountryApprovers = config.data['approvers']
-
-# get region dictionary from config and swap keys and values
-# to make it easy to look up the region name from the CLIN
-for region in config.data['regions']:
-	Regions[config.data['regions'][region]] = region
+# pandas, the labor data and the openpyxl formatting are imported where they are used,
+# so printing the usage does not load them
+config = getConfig()
 
 # construct a summary dataframe for writing into the file
-def summaryDataframe(description:str, hours:float, amount:float) -> pd.DataFrame:
+def summaryDataframe(description:str, hours:float, amount:float) -> 'pd.DataFrame':
+	import pandas as pd
+
 	data = {
 		'blank1': '',
 		'Description': description,
@@ -32,103 +21,96 @@ def summaryDataframe(description:str, hours:float, amount:float) -> pd.DataFrame
 
 	return pd.DataFrame(data, index=[0])
 
-if __name__ == '__main__':
-	import sys
-
-	if len(sys.argv) < 2:
-		print(f'Usage: {sys.argv[0]} <billing activity file>')
-		sys.exit(1)
-
-	filename = sys.argv[1]
-
-	labor = LaborData.fromReportFile(filename)
+def writePostInvoice(labor: 'LaborData', clin: str, invoiceNumberValue: int) -> str:
 	time = labor.time
 
 	startYear = time.startYear()
 	startMonth = time.startMonthName()
-	locationInfo = time.locationsByCLIN()
-	invoiceNumberValue = config.data['nextInvoiceNumber']
-
-	for clin in locationInfo.keys():
-		region = Regions[clin]
-		invoiceData = labor.invoiceData[clin]
-
-		prefix = config.data['filenamePrefixes']['postInvoices']
-		pattern = f'{prefix}-{region}-{startYear}-{startMonth}'
-		outputFile = f'{pattern}.xlsx'
-
-		sheetInfo = {}
-		firstRow = 3
-		spaceToSummary = 4
-
-		with pd.ExcelWriter(outputFile) as writer:
-			sheetName = f'Post-{region}'
-
-			costs = time.postByCountry(clin=clin)
-			post = time.postSummaryByPostName(clin=clin)
-			numPostRows = post.shape[0]
-
-			postData = time.groupedForPostReport(clin=clin)
-			numPostDetailRows = postData.shape[0]
-			invoiceData.addPostDetail(postData)
-
-			dangerPay = time.dangerPaySummaryByPostName(clin=clin)
-			numDangerPayRows = dangerPay.shape[0]
-
-			dangerPayData = time.groupedForDangerReport(clin=clin)
-			invoiceData.addDangerPayDetail(dangerPayData)
-
-			dangerPayDetails = time.groupedForDangerReport(clin=clin)
-			numDangerPayDetailRows = dangerPayDetails.shape[0]
-
-			invoiceAmount = costs['Total'].sum()
-
-			if invoiceAmount > 0:
-				summaryStartRow = 22
-				rowsToSum = []
-
-				rows = costs.shape[0]
-				costs.to_excel(writer, sheet_name=sheetName, startrow=summaryStartRow, startcol=0, header=False)
-				rowsToSum.append((summaryStartRow + 1, summaryStartRow + rows))
-				summaryStartRow = summaryStartRow + rows + spaceToSummary
-
-				invoiceNumber = f'SD-{invoiceNumberValue:04d}'
-				invoiceNumberValue += 1		
-
-				startMonthName = time.dateStart.strftime('%b')
-				endMonthName = time.dateEnd.strftime('%b')
-				billingPeriod = time.billingPeriod()
-				
-				invoiceDetail = {
-					'filename': outputFile,
-					'type': 'Post',
-					'invoiceNumber': invoiceNumber,
-					'taskOrder': f'Post-{region}',
-					'billingPeriod': billingPeriod,
-					'invoiceAmount': invoiceAmount,
-					'rowsToSum': rowsToSum, 
-					'postRows': numPostRows,
-					'postDetailRows': numPostDetailRows,
-					'dangerPayRows': numDangerPayRows,
-					'dangerPayDetailRows': numDangerPayDetailRows
-				}
-
-				sheetInfo[sheetName] = invoiceDetail
-
-			sheetName = f'Post-{region}-Post'
-			postData.to_excel(writer, sheet_name=sheetName, startrow=firstRow, startcol=0, header=True, index=False)
-			post.to_excel(writer, sheet_name=sheetName, startrow=numPostDetailRows + firstRow + spaceToSummary, startcol=5, header=False, index=False)
-
-			if numDangerPayDetailRows > 0:
-				sheetName = f'Post-{region}-DangerPay'
-				dangerPayDetails.to_excel(writer, sheet_name=sheetName, startrow=firstRow, startcol=0, header=True, index=False)
-				dangerPay.to_excel(writer, sheet_name=sheetName, startrow=numDangerPayDetailRows + firstRow + spaceToSummary, startcol=5, header=False, index=False)
-				
-		workbook = load_workbook(outputFile)
+
+	region = config.regionsByCLIN()[clin]
+	invoiceData = labor.invoiceData[clin]
+
+	prefix = config.data['filenamePrefixes']['postInvoices']
+	pattern = f'{prefix}-{region}-{startYear}-{startMonth}'
+	outputFile = f'{pattern}.xlsx'
+
+	sheetInfo = {}
+	firstRow = 3
+	spaceToSummary = 4
+
+	import pandas as pd
+	from InvoiceStyles import styles
+	from InvoiceFormat import formatCostsTab, formatPostDetails
+
+	# the workbook is formatted in memory and written once when the writer closes
+	with pd.ExcelWriter(outputFile, engine='openpyxl') as writer:
+		sheetName = f'Post-{region}'
+
+		costs = time.postByCountry(clin=clin)
+		post = time.postSummaryByPostName(clin=clin)
+		numPostRows = post.shape[0]
+
+		postData = time.groupedForPostReport(clin=clin)
+		numPostDetailRows = postData.shape[0]
+		invoiceData.addPostDetail(postData)
+
+		dangerPay = time.dangerPaySummaryByPostName(clin=clin)
+		numDangerPayRows = dangerPay.shape[0]
+
+		dangerPayData = time.groupedForDangerReport(clin=clin)
+		invoiceData.addDangerPayDetail(dangerPayData)
+
+		dangerPayDetails = time.groupedForDangerReport(clin=clin)
+		numDangerPayDetailRows = dangerPayDetails.shape[0]
+
+		invoiceAmount = costs['Total'].sum()
+
+		if invoiceAmount > 0:
+			summaryStartRow = 22
+			rowsToSum = []
+
+			rows = costs.shape[0]
+			costs.to_excel(writer, sheet_name=sheetName, startrow=summaryStartRow, startcol=0, header=False, index=False)
+			rowsToSum.append((summaryStartRow + 1, summaryStartRow + rows))
+			summaryStartRow = summaryStartRow + rows + spaceToSummary
+
+			invoiceNumber = f'SD-{invoiceNumberValue:04d}'
+			invoiceNumberValue += 1		
+
+			startMonthName = time.dateStart.strftime('%b')
+			endMonthName = time.dateEnd.strftime('%b')
+			billingPeriod = time.billingPeriod()
+			
+			invoiceDetail = {
+				'filename': outputFile,
+				'type': 'Post',
+				'invoiceNumber': invoiceNumber,
+				'taskOrder': f'Post-{region}',
+				'billingPeriod': billingPeriod,
+				'invoiceAmount': invoiceAmount,
+				'rowsToSum': rowsToSum, 
+				'postRows': numPostRows,
+				'postDetailRows': numPostDetailRows,
+				'dangerPayRows': numDangerPayRows,
+				'dangerPayDetailRows': numDangerPayDetailRows
+			}
+
+			sheetInfo[sheetName] = invoiceDetail
+
+		sheetName = f'Post-{region}-Post'
+		postData.to_excel(writer, sheet_name=sheetName, startrow=firstRow, startcol=0, header=True, index=False)
+		post.to_excel(writer, sheet_name=sheetName, startrow=numPostDetailRows + firstRow + spaceToSummary, startcol=5, header=False, index=False)
+
+		if numDangerPayDetailRows > 0:
+			sheetName = f'Post-{region}-DangerPay'
+			dangerPayDetails.to_excel(writer, sheet_name=sheetName, startrow=firstRow, startcol=0, header=True, index=False)
+			dangerPay.to_excel(writer, sheet_name=sheetName, startrow=numDangerPayDetailRows + firstRow + spaceToSummary, startcol=5, header=False, index=False)
+			
+		workbook = writer.book
 
 		for styleName in styles.keys():
 			workbook.add_named_style(styles[styleName])
-		
+
 		for key in sheetInfo.keys():
 			worksheet = workbook[key]
 			info = sheetInfo[key]
@@ -145,4 +127,48 @@ if __name__ == '__main__':
 				postTitle = f'{region} Danger Pay {time.dateStart.strftime("%B")} {startYear}'
 				formatPostDetails(worksheet, postTitle, firstRow, info['dangerPayDetailRows'], spaceToSummary, info['dangerPayRows'])
 
-		workbook.save(outputFile)
\ No newline at end of file
+	return outputFile
+
+def hasPostInvoice(labor: 'LaborData', clin: str) -> bool:
+	# only a CLIN with post or danger pay to bill gets an invoice
+	return labor.time.postByCountry(clin=clin)['Total'].sum() > 0
+
+def postInvoiceCount(labor: 'LaborData') -> int:
+	# the invoice numbers postJobs hands out
+	return sum(hasPostInvoice(labor, clin) for clin in labor.time.locationsByCLIN().keys())
+
+def postJobs(labor: 'LaborData', invoiceNumberValue: int = None) -> list:
+	if invoiceNumberValue is None:
+		invoiceNumberValue = config.data['nextInvoiceNumber']
+
+	# invoice numbers are handed out up front so the workbooks do not depend on the order they are written
+	jobList = []
+
+	for clin in labor.time.locationsByCLIN().keys():
+		jobList.append((writePostInvoice, (clin, invoiceNumberValue)))
+
+		if hasPostInvoice(labor, clin):
+			invoiceNumberValue += 1
+
+	return jobList
+
+def writePostInvoices(labor: 'LaborData', invoiceNumberValue: int = None, jobs=1) -> list:
+	return runJobs(labor, postJobs(labor, invoiceNumberValue), jobs)
+
+if __name__ == '__main__':
+	import sys
+
+	jobs, arguments = parseJobs(sys.argv[1:])
+
+	useCache, arguments = parseNoCache(arguments)
+
+	if len(arguments) < 1:
+		print(f'Usage: {sys.argv[0]} [--jobs N] [--no-cache] <billing activity file>')
+		sys.exit(1)
+
+	filename = arguments[0]
+
+	from LaborData import LaborData
+
+	labor = LaborData.fromReportFile(filename, useCache=useCache)
+	writePostInvoices(labor, jobs=jobs)
@@ -1,21 +1,15 @@
 #!/usr/local/bin/python
-import pandas as pd
-from openpyxl import load_workbook
+from Config import getConfig
+from Jobs import parseNoCache
 
-from Config import Config
-from LaborData import LaborData
-
-from InvoiceStyles import styles
-from InvoiceFormat import formatCostsTab, formatPostDetails
-
-config = Config()
-Regions = config.data['regions']
-
-versionString = f'v{config.data["version"]}'
-CountryApprovers = config.data['approvers']
+# pandas, the labor data and the openpyxl formatting are imported where they are used,
+# so printing the usage does not load them
+config = getConfig()
 
 # construct a summary dataframe for writing into the file
-def summaryDataframe(description:str, hours:float, amount:float) -> pd.DataFrame:
+def summaryDataframe(description:str, hours:float, amount:float) -> 'pd.DataFrame':
+	import pandas as pd
+
 	data = {
 		'blank1': '',
 		'Description': description,
@@ -30,13 +24,15 @@ def summaryDataframe(description:str, hours:float, amount:float) -> pd.DataFrame
 if __name__ == '__main__':
 	import sys
 
-	if len(sys.argv) < 4:
-		print(f'Usage: {sys.argv[0]} <regionName> <invoiceNumber> <billing activity file>')
+	useCache, arguments = parseNoCache(sys.argv[1:])
+
+	if len(arguments) < 3:
+		print(f'Usage: {sys.argv[0]} [--no-cache] <regionName> <invoiceNumber> <billing activity file>')
 		sys.exit(1)
 
-	region = sys.argv[1]
-	invoiceNumberInput = sys.argv[2]	# this is the number part, although it can have an R if a revision of a revision
-	filename = sys.argv[3]
+	region = arguments[0]
+	invoiceNumberInput = arguments[1]	# this is the number part, although it can have an R if a revision of a revision
+	filename = arguments[2]
 
 	# the invoiceNumberValue is the number part of the invoice number (before any R suffix)
 	try:
@@ -55,19 +51,23 @@ if __name__ == '__main__':
 	print(f'This is revision: {revisionCount}')
 	print(f'Invoice Number: {invoiceNumber}')
 
-	labor = LaborData.fromReportFile(filename)
+	from LaborData import LaborData
+
+	labor = LaborData.fromReportFile(filename, useCache=useCache)
 	time = labor.time
 
 	startYear = time.startYear()
 	startMonth = time.startMonthName()
 	locationInfo = time.locationsByCLIN()
 
-	if region not in Regions.keys():
+	regions = config.data['regions']
+
+	if region not in regions.keys():
 		print(f'Error: "{region}" is not a valid region name')
-		print(f'Available regions are: {", ".join(Regions.keys())}')
+		print(f'Available regions are: {", ".join(regions.keys())}')
 		exit(-1)
 
-	clin = Regions[region]
+	clin = regions[region]
 	invoiceData = labor.invoiceData[clin]
 
 	prefix = config.data['filenamePrefixes']['revisedPost']
@@ -78,7 +78,12 @@ if __name__ == '__main__':
 	firstRow = 3
 	spaceToSummary = 4
 
-	with pd.ExcelWriter(outputFile) as writer:
+	import pandas as pd
+	from InvoiceStyles import styles
+	from InvoiceFormat import formatCostsTab, formatPostDetails
+
+	# the workbook is formatted in memory and written once when the writer closes
+	with pd.ExcelWriter(outputFile, engine='openpyxl') as writer:
 		sheetName = f'Post-{region}'
 
 		costs = time.postByCountry(clin=clin)
@@ -105,7 +110,7 @@ if __name__ == '__main__':
 			rowsToSum = []
 
 			rows = costs.shape[0]
-			costs.to_excel(writer, sheet_name=sheetName, startrow=summaryStartRow, startcol=0, header=False)
+			costs.to_excel(writer, sheet_name=sheetName, startrow=summaryStartRow, startcol=0, header=False, index=False)
 			rowsToSum.append((summaryStartRow + 1, summaryStartRow + rows))
 			summaryStartRow = summaryStartRow + rows + spaceToSummary
 
@@ -138,25 +143,23 @@ if __name__ == '__main__':
 			dangerPayDetails.to_excel(writer, sheet_name=sheetName, startrow=firstRow, startcol=0, header=True, index=False)
 			dangerPay.to_excel(writer, sheet_name=sheetName, startrow=numDangerPayDetailRows + firstRow + spaceToSummary, startcol=5, header=False, index=False)
 			
-	workbook = load_workbook(outputFile)
-
-	for styleName in styles.keys():
-		workbook.add_named_style(styles[styleName])
-	
-	for key in sheetInfo.keys():
-		worksheet = workbook[key]
-		info = sheetInfo[key]
-		formatCostsTab(worksheet, info)
-
-		detailSheetName = f'Post-{region}-Post'
-		worksheet = workbook[detailSheetName]
-		postTitle = f'{region} Post {time.dateStart.strftime("%B")} {startYear}'
-		formatPostDetails(worksheet, postTitle, firstRow, info['postDetailRows'], spaceToSummary, info['postRows'])
-
-		if info['dangerPayDetailRows'] > 0:
-			detailSheetName = f'Post-{region}-DangerPay'
-			worksheet = workbook[detailSheetName]
-			postTitle = f'{region} Danger Pay {time.dateStart.strftime("%B")} {startYear}'
-			formatPostDetails(worksheet, postTitle, firstRow, info['dangerPayDetailRows'], spaceToSummary, info['dangerPayRows'])
+		workbook = writer.book
 
-	workbook.save(outputFile)
\ No newline at end of file
+		for styleName in styles.keys():
+			workbook.add_named_style(styles[styleName])
+
+		for key in sheetInfo.keys():
+			worksheet = workbook[key]
+			info = sheetInfo[key]
+			formatCostsTab(worksheet, info)
+
+			detailSheetName = f'Post-{region}-Post'
+			worksheet = workbook[detailSheetName]
+			postTitle = f'{region} Post {time.dateStart.strftime("%B")} {startYear}'
+			formatPostDetails(worksheet, postTitle, firstRow, info['postDetailRows'], spaceToSummary, info['postRows'])
+
+			if info['dangerPayDetailRows'] > 0:
+				detailSheetName = f'Post-{region}-DangerPay'
+				worksheet = workbook[detailSheetName]
+				postTitle = f'{region} Danger Pay {time.dateStart.strftime("%B")} {startYear}'
+				formatPostDetails(worksheet, postTitle, firstRow, info['dangerPayDetailRows'], spaceToSummary, info['dangerPayRows'])
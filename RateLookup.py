@@ -0,0 +1,87 @@
+# Effective-date lookups for rate tables that keep their history, such as the billing rates
+# by RoleID and the allowances by PostName. A rate is in force from its EffectiveDate until the
+# next EffectiveDate for the same key, so the rate for a date is the latest one on or before it.
+import numpy as np
+import pandas as pd
+
+def ratesOn(keys: pd.Series, dates: pd.Series, rates: pd.DataFrame, key: str) -> pd.DataFrame:
+	# the rates row in force for each (key, date) pair, aligned to the index of keys,
+	# pairs with no rate in force (or no date) get NaN
+	keyCodes, keyValues = pd.factorize(keys.to_numpy())
+	# merge_asof needs the dates in the same unit on both sides
+	dateCodes, dateValues = pd.factorize(pd.to_datetime(dates).to_numpy().astype('datetime64[ns]'))
+
+	# activity repeats the same few thousand pairs, so each distinct pair is looked up once
+	pairCodes = np.where((keyCodes >= 0) & (dateCodes >= 0), keyCodes * len(dateValues) + dateCodes, -1)
+	pairCodes, pairValues = pd.factorize(pairCodes, use_na_sentinel=False)
+
+	valid = np.flatnonzero(pairValues >= 0)
+	lookup = pd.DataFrame({
+		key: keyValues.take(pairValues[valid] // len(dateValues)) if len(valid) > 0 else keyValues[:0],
+		'LookupDate': dateValues.take(pairValues[valid] % len(dateValues)) if len(valid) > 0 else dateValues[:0],
+		'Pair': valid
+	})
+	lookup = lookup.sort_values('LookupDate', kind='stable')
+
+	history = rates.reset_index(drop=True)
+	history = history.loc[history[key].notna() & history['EffectiveDate'].notna(), [key, 'EffectiveDate']]
+	history['EffectiveDate'] = history['EffectiveDate'].astype('datetime64[ns]')
+	history['RateRow'] = history.index
+	history = history.sort_values('EffectiveDate', kind='stable')
+
+	joined = pd.merge_asof(lookup, history, left_on='LookupDate', right_on='EffectiveDate', by=key, direction='backward')
+
+	# position in rates for every pair, -1 where nothing is in force
+	pairRows = np.full(len(pairValues), -1)
+	found = joined['RateRow'].notna().to_numpy()
+	pairRows[joined['Pair'].to_numpy()[found]] = joined['RateRow'].to_numpy()[found]
+
+	result = rates.reset_index(drop=True).reindex(pairRows[pairCodes])
+	result.index = keys.index
+
+	return result
+
+class RateTable:
+	def __init__(self, history: pd.DataFrame, key: str):
+		self.history = history		# every rate, one row per key and EffectiveDate
+		self.key = key				# the column the rates are looked up by, e.g. RoleID or PostName
+
+		# rows without a key or an EffectiveDate are never in force
+		periods = history.loc[history[key].notna() & history['EffectiveDate'].notna()]
+		periods = periods.sort_values([key, 'EffectiveDate'], kind='stable').reset_index(drop=True)
+
+		# each rate is in force from its EffectiveDate until the next one for the same key,
+		# a repeated EffectiveDate leaves the earlier row with an empty period so the last one listed wins
+		nextDates = periods.groupby(key, sort=False)['EffectiveDate'].shift(-1).fillna(pd.Timestamp.max)
+		self.periods = periods		# the rates sorted by key and EffectiveDate
+		self.intervals = pd.IntervalIndex.from_arrays(periods['EffectiveDate'], nextDates, closed='left')
+
+		# the rows of each key are contiguous, so a key is a slice of the periods
+		self.slices = {
+			value: slice(rows[0], rows[-1] + 1)
+			for value, rows in periods.groupby(key, sort=False).indices.items()
+		}
+
+	def asOf(self, date) -> pd.DataFrame:
+		# one row per key with the rates in force on date, sorted by key,
+		# keys whose rates all start after date are left out
+		inForce = self.intervals.contains(pd.to_datetime(date))
+		return self.periods.loc[inForce].reset_index(drop=True)
+
+	def rateAt(self, value, date) -> pd.Series:
+		# the rates row in force for a single key on date, or None
+		rows = self.slices.get(value)
+		if rows is None:
+			return None
+
+		date = pd.to_datetime(date)
+		intervals = self.intervals[rows]
+		position = intervals.left.searchsorted(date, side='right') - 1
+
+		if position < 0 or date not in intervals[position]:
+			return None
+
+		return self.periods.iloc[rows.start + position]
+
+	def ratesOn(self, keys: pd.Series, dates: pd.Series) -> pd.DataFrame:
+		return ratesOn(keys, dates, self.periods, self.key)
@@ -0,0 +1,131 @@
+#!/usr/local/bin/python
+# Keeps the cleaned rate tables in a SQLite database so BillingRates.xlsx and AllowanceRates.csv
+# are only read and cleaned again when their contents change. Every distinct source file gets
+# its own version, so the rates as they were before a file was edited can still be looked up.
+import os
+import sqlite3
+import hashlib
+from contextlib import closing
+from datetime import datetime
+import pandas as pd
+
+from ActivityCache import fileHash
+
+# bump this when the cleanup of a rate file changes so stored tables are rebuilt
+RateStoreVersion = 1
+
+# the column each stored table is looked up by
+RateKeys = {
+	'BillingRates': 'RoleID',
+	'Allowances': 'PostName'
+}
+
+class RateStore:
+	def __init__(self, filename=None, verbose=False):
+		self.filename = filename if filename is not None else 'cache/rates.sqlite'
+		self.verbose = verbose
+
+	def connect(self):
+		os.makedirs(os.path.dirname(self.filename) or '.', exist_ok=True)
+
+		# other processes may be building the same version, so wait for their locks
+		db = sqlite3.connect(self.filename, timeout=60)
+		db.execute('''
+			CREATE TABLE IF NOT EXISTS versions (
+				version INTEGER PRIMARY KEY AUTOINCREMENT,
+				name TEXT NOT NULL,
+				sourceHash TEXT NOT NULL,
+				source TEXT NOT NULL,
+				dateColumns TEXT NOT NULL,
+				built TEXT NOT NULL,
+				UNIQUE (name, sourceHash)
+			)
+		''')
+
+		return db
+
+	def tableName(self, name: str, sourceHash: str) -> str:
+		return f'{name}_{sourceHash[:16]}'
+
+	def load(self, name: str, sourceFile: str, build) -> pd.DataFrame:
+		# the stored table for the current contents of sourceFile, build() makes it if there is none
+		digest = hashlib.sha256(f'v{RateStoreVersion}'.encode())
+		digest.update(fileHash(sourceFile).encode())
+		sourceHash = digest.hexdigest()
+
+		with closing(self.connect()) as db:
+			found = db.execute('SELECT version FROM versions WHERE name = ? AND sourceHash = ?', (name, sourceHash)).fetchone()
+
+			if found is not None:
+				if self.verbose:
+					print(f'Loading {name} version {found[0]} from {self.filename}')
+
+				return self.read(db, name, found[0])
+
+			df = build()
+			self.save(db, name, sourceFile, sourceHash, df)
+
+		return df
+
+	def save(self, db, name: str, sourceFile: str, sourceHash: str, df: pd.DataFrame):
+		dateColumns = [column for column in df.columns if pd.api.types.is_datetime64_any_dtype(df[column])]
+
+		# the table is complete before its version is listed, so readers never see a partial table
+		df.to_sql(self.tableName(name, sourceHash), db, if_exists='replace', index=False)
+
+		with db:
+			db.execute(
+				'INSERT OR IGNORE INTO versions (name, sourceHash, source, dateColumns, built) VALUES (?, ?, ?, ?, ?)',
+				(name, sourceHash, sourceFile, ','.join(dateColumns), datetime.now().isoformat(timespec='seconds'))
+			)
+
+		if self.verbose:
+			print(f'Saved {name} from {sourceFile} to {self.filename}')
+
+	def read(self, db, name: str, version: int) -> pd.DataFrame:
+		sourceHash, dateColumns = db.execute('SELECT sourceHash, dateColumns FROM versions WHERE version = ? AND name = ?', (version, name)).fetchone()
+		dateColumns = [column for column in dateColumns.split(',') if column != '']
+
+		return pd.read_sql(f'SELECT * FROM "{self.tableName(name, sourceHash)}"', db, parse_dates=dateColumns)
+
+	def versions(self, name: str) -> pd.DataFrame:
+		with closing(self.connect()) as db:
+			return pd.read_sql('SELECT version, source, sourceHash, built FROM versions WHERE name = ? ORDER BY version', db, params=(name,))
+
+	def history(self, name: str, version=None) -> pd.DataFrame:
+		# a stored version of the rates, the latest one if no version is given
+		with closing(self.connect()) as db:
+			if version is None:
+				found = db.execute('SELECT MAX(version) FROM versions WHERE name = ?', (name,)).fetchone()
+				version = found[0]
+
+			if version is None:
+				return None
+
+			return self.read(db, name, version)
+
+if __name__ == '__main__':
+	import sys
+
+	# lists the stored versions of a rate table, or the rates as of a date from one of them
+	if len(sys.argv) < 2:
+		print(f'Usage: {sys.argv[0]} <BillingRates|Allowances> [date [version]]')
+		sys.exit(1)
+
+	from RateLookup import RateTable
+
+	name = sys.argv[1]
+	store = RateStore()
+
+	if len(sys.argv) < 3:
+		print(store.versions(name).to_string(index=False))
+		sys.exit(0)
+
+	version = int(sys.argv[3]) if len(sys.argv) > 3 else None
+	history = store.history(name, version)
+
+	if history is None:
+		print(f'No stored versions of {name} in {store.filename}')
+		sys.exit(1)
+
+	print(RateTable(history, RateKeys[name]).asOf(sys.argv[2]))
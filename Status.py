@@ -1,61 +1,53 @@
 #!/usr/local/bin/python
-import pandas as pd
-from openpyxl import load_workbook
+from Config import getConfig
+from Jobs import runJobs, parseJobs, parseNoCache
 
-from Config import Config
-from LaborData import LaborData
-
-from InvoiceStyles import styles
-from InvoiceFormat import formatTimeByEmployee, formatTimeByDate
-
-config = Config()
-
-Regions = {}
-
-# get region dictionary from config and swap keys and values
-# to make it easy to look up the region name from the CLIN
-for region in config.data['regions']:
-	Regions[config.data['regions'][region]] = region
+# pandas, the labor data and the openpyxl formatting are imported where they are used,
+# so printing the usage does not load them
+config = getConfig()
 
+def writeStatusWorkbook(labor: 'LaborData', clin: str, streaming=False) -> str:
+	time = labor.time
 
-if __name__ == '__main__':
-	import sys
+	startYear = time.startYear()
+	startMonth = time.startMonthName()
 
-	if len(sys.argv) < 2:
-		print(f'Usage: {sys.argv[0]} <billing activity file>')
-		sys.exit(1)
+	reportType = config.data['filenamePrefixes']['status']
+	region = config.regionsByCLIN()[clin]
+	pattern = f'{reportType}-{region}-{startYear}-{startMonth}'
+	outputFile = f'{pattern}.xlsx'
 
-	filename = sys.argv[1]
+	regionDate = time.statusByDate(clin=clin)
+	regionDate.drop(columns=['PostName'], inplace=True)
 
-	labor = LaborData.fromReportFile(filename)
-	time = labor.time
+	# if all hours are approved sort ascending by date, false if not
+	dateAscending = regionDate['State'].eq('Approved').all()
 
-	startYear = time.startYear()
-	startMonth = time.startMonthName()
-	locationInfo = time.locationsByCLIN()
-	invoiceNumberValue = config.data['nextInvoiceNumber']
+	regionDate.sort_values(['Date', 'EmployeeName'], ascending=[dateAscending, True], inplace=True)
 
-	for clin in locationInfo.keys():
-		reportType = config.data['filenamePrefixes']['status']
-		region = Regions[clin]
-		pattern = f'{reportType}-{region}-{startYear}-{startMonth}'
-		outputFile = f'{pattern}.xlsx'
+	regionEmployee = time.byEmployee(clin=clin)
 
-		regionDate = time.statusByDate(clin=clin)
-		regionDate.drop(columns=['PostName'], inplace=True)
+	if streaming:
+		# rows are flushed to disk as they are written, for regions too large to build in memory
+		from StreamingFormat import StreamingWorkbook, writeTimeByEmployee, writeTimeByDate
 
-		# if all hours are approved sort ascending by date, false if not
-		dateAscending = regionDate['State'].eq('Approved').all()
+		with StreamingWorkbook(outputFile) as workbook:
+			writeTimeByEmployee(workbook, 'Employee', regionEmployee)
+			writeTimeByDate(workbook, 'Date', regionDate)
 
-		regionDate.sort_values(['Date', 'EmployeeName'], ascending=[dateAscending, True], inplace=True)
+		return outputFile
 
-		regionEmployee = time.byEmployee(clin=clin)
+	import pandas as pd
+	from InvoiceStyles import styles
+	from InvoiceFormat import formatTimeByEmployee, formatTimeByDate
 
-		with pd.ExcelWriter(outputFile) as writer:
-			regionEmployee.to_excel(writer, sheet_name='Employee', startrow=0, startcol=0, header=True, index=False)
-			regionDate.to_excel(writer, sheet_name='Date', startrow=0, startcol=0, header=True, index=False)
-			
-		workbook = load_workbook(outputFile)
+	# the workbook is formatted in memory and written once when the writer closes
+	with pd.ExcelWriter(outputFile, engine='openpyxl') as writer:
+		# row 1 is left free for the subtotals
+		regionEmployee.to_excel(writer, sheet_name='Employee', startrow=1, startcol=0, header=True, index=False)
+		regionDate.to_excel(writer, sheet_name='Date', startrow=1, startcol=0, header=True, index=False)
+		
+		workbook = writer.book
 
 		for styleName in styles.keys():
 			workbook.add_named_style(styles[styleName])
@@ -66,4 +58,33 @@ if __name__ == '__main__':
 		worksheet = workbook['Date']
 		formatTimeByDate(worksheet)
 
-		workbook.save(outputFile)
\ No newline at end of file
+	return outputFile
+
+def statusJobs(labor: 'LaborData', streaming=False) -> list:
+	# one workbook per CLIN
+	return [(writeStatusWorkbook, (clin, streaming)) for clin in labor.time.locationsByCLIN().keys()]
+
+def writeStatusWorkbooks(labor: 'LaborData', jobs=1, streaming=False) -> list:
+	return runJobs(labor, statusJobs(labor, streaming), jobs)
+
+if __name__ == '__main__':
+	import sys
+
+	jobs, arguments = parseJobs(sys.argv[1:])
+
+	# --streaming writes the workbooks with XlsxWriter in constant memory mode
+	streaming = '--streaming' in arguments
+	arguments = [argument for argument in arguments if argument != '--streaming']
+
+	useCache, arguments = parseNoCache(arguments)
+
+	if len(arguments) < 1:
+		print(f'Usage: {sys.argv[0]} [--jobs N] [--no-cache] [--streaming] <billing activity file>')
+		sys.exit(1)
+
+	filename = arguments[0]
+
+	from LaborData import LaborData
+
+	labor = LaborData.fromReportFile(filename, useCache=useCache)
+	writeStatusWorkbooks(labor, jobs=jobs, streaming=streaming)
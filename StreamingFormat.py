@@ -0,0 +1,223 @@
+# Constant-memory workbook writer for the large Status and Approvals sheets.
+# XlsxWriter is an optional dependency that is only imported when streaming is requested.
+# In constant_memory mode each row is flushed to disk as soon as the next row is started,
+# so every sheet here is written strictly top to bottom and styles are applied as the
+# cells are written instead of being patched in afterwards like InvoiceFormat does.
+import io
+import datetime
+import numbers as numberTypes
+
+import pandas as pd
+import xlsxwriter
+from xlsxwriter.utility import xl_col_to_name
+from openpyxl.styles.numbers import BUILTIN_FORMATS_REVERSE
+
+from InvoiceStyles import styles
+from Config import getConfig
+from InvoiceFormat import processingDate, logoFile, logoData, yellow, orange, gray, blue, lightBlue
+
+# fills used to highlight rows that are not approved, anything not listed is blue
+StateFills = {
+    'Approved': None,
+    'Submitted': yellow,
+    'Draft': gray,
+    'Declined': orange
+}
+
+def colorValue(color) -> str:
+    # openpyxl colors are ARGB, XlsxWriter wants #RRGGBB
+    return '#' + color.rgb[-6:]
+
+def formatProperties(namedStyle) -> dict:
+    # translate one of the openpyxl named styles in InvoiceStyles into XlsxWriter format properties
+    properties = {}
+
+    numberFormat = namedStyle.number_format
+    if numberFormat != 'General':
+        properties['num_format'] = BUILTIN_FORMATS_REVERSE.get(numberFormat, numberFormat)
+
+    font = namedStyle.font
+    if font.b:
+        properties['bold'] = True
+    if font.sz is not None:
+        properties['font_size'] = font.sz
+    if font.color is not None and font.color.type == 'rgb':
+        properties['font_color'] = colorValue(font.color)
+
+    if namedStyle.alignment.horizontal is not None:
+        properties['align'] = namedStyle.alignment.horizontal
+
+    for side in ['left', 'top', 'right', 'bottom']:
+        borderSide = getattr(namedStyle.border, side)
+        if borderSide is not None and borderSide.style == 'thin':
+            properties[side] = 1
+
+    if namedStyle.fill.fill_type == 'solid':
+        properties['pattern'] = 1
+        properties['bg_color'] = colorValue(namedStyle.fill.fgColor)
+
+    return properties
+
+def columnStyle(type) -> tuple:
+    # same lookup as InvoiceFormat.styleColumn, returns (style name, width)
+    dataStyles = getConfig().data['dataStyles']
+
+    if dataStyles.get(type) is not None:
+        return dataStyles[type]['style'], dataStyles[type]['width']
+
+    print(f'style for {type} not found')
+    return 'defaultCell', 12
+
+class StreamingWorkbook(xlsxwriter.Workbook):
+    def __init__(self, filename):
+        super().__init__(filename, {'constant_memory': True})
+
+        # every combination of style, fill and border is created once per workbook
+        self.cachedFormats = {}
+
+    def style(self, styleName, fill=None, border=False):
+        key = (styleName, None if fill is None else colorValue(fill.start_color), border)
+
+        if key not in self.cachedFormats:
+            properties = formatProperties(styles[styleName])
+
+            if fill is not None:
+                properties['pattern'] = 1
+                properties['bg_color'] = key[1]
+
+            if border:
+                properties.update({'left': 1, 'top': 1, 'right': 1, 'bottom': 1})
+
+            self.cachedFormats[key] = self.add_format(properties)
+
+        return self.cachedFormats[key]
+
+    def styleColumns(self, worksheet, types):
+        # the column style and width replace the per-cell loop in styleColumn
+        for column, type in enumerate(types):
+            styleName, width = columnStyle(type)
+            worksheet.set_column(column, column, width, self.style(styleName))
+
+def writeValue(worksheet, row, column, value, cellFormat=None):
+    if value is None or value is pd.NaT or (isinstance(value, float) and value != value):
+        if cellFormat is not None:
+            worksheet.write_blank(row, column, None, cellFormat)
+    elif isinstance(value, datetime.date):
+        worksheet.write_datetime(row, column, value, cellFormat)
+    elif isinstance(value, numberTypes.Number):
+        worksheet.write_number(row, column, value, cellFormat)
+    else:
+        worksheet.write_string(row, column, str(value), cellFormat)
+
+def writeSubtotals(workbook, worksheet, row, columns, start, stop):
+    # same formula and style as InvoiceFormat.sumColumn, start and stop are 1-based rows
+    for column in columns:
+        letter = xl_col_to_name(column)
+        worksheet.write_formula(row, column, f'=SUBTOTAL(109, {letter}{start}:{letter}{stop})', workbook.style('numberCellTotal'))
+
+def writeTimeSheet(workbook, sheetName, df, types, filterColumns):
+    # streaming version of formatTimeByDate and formatTimeByEmployee
+    worksheet = workbook.add_worksheet(sheetName)
+    workbook.styleColumns(worksheet, types)
+
+    hoursColumns = range(4, len(types))
+    nonBillableColumns = [7, 8, 9]
+    summaryColumns = [14, 15, 16]
+
+    # row 1 holds the subtotals, row 2 the header and the data starts in row 3
+    stop = len(df) + 2
+    writeSubtotals(workbook, worksheet, 0, hoursColumns, 3, stop)
+
+    rows = [list(df.columns)] + list(df.itertuples(index=False, name=None))
+    stateColumn = 3
+
+    for index, values in enumerate(rows):
+        row = index + 1
+        rowFill = None if index == 0 else StateFills.get(values[stateColumn], blue)
+
+        for column, value in enumerate(values):
+            styleName = columnStyle(types[column])[0]
+
+            if column in nonBillableColumns:
+                cellFormat = workbook.style(styleName, gray)
+            elif column in summaryColumns:
+                cellFormat = workbook.style(styleName, lightBlue)
+            elif rowFill is not None:
+                cellFormat = workbook.style(styleName, rowFill)
+            else:
+                cellFormat = None
+
+            writeValue(worksheet, row, column, value, cellFormat)
+
+    # tables are not available in constant_memory mode so the header gets an autofilter instead
+    worksheet.autofilter(1, 0, stop - 1, filterColumns - 1)
+    worksheet.freeze_panes(2, 0)
+
+    return worksheet
+
+def writeTimeByDate(workbook, sheetName, df):
+    types = ['Date', 'Name', 'SubCLIN', 'State'] + ['Hours'] * 13
+    return writeTimeSheet(workbook, sheetName, df, types, 16)
+
+def writeTimeByEmployee(workbook, sheetName, df):
+    types = ['City', 'SubCLIN', 'Name', 'State'] + ['Hours'] * 13
+    return writeTimeSheet(workbook, sheetName, df, types, 15)
+
+def writeHeaderInfo(workbook, worksheet, values):
+    # the label/value pairs in G1:H3 above the hours table
+    for row, (label, value) in enumerate(values):
+        if value is not None:
+            worksheet.write_string(row, 6, label, workbook.style('invoiceHeader'))
+            worksheet.write_string(row, 7, value, workbook.style('invoiceValue'))
+
+def writeHoursTable(workbook, worksheet, df, types, hoursStart):
+    # header in row 4, bordered data below it and subtotals under the last row
+    aboveRows = 3
+    workbook.styleColumns(worksheet, types)
+
+    for column, value in enumerate(df.columns):
+        worksheet.write_string(aboveRows, column, value, workbook.style('summaryTitle'))
+
+    for index, values in enumerate(df.itertuples(index=False, name=None)):
+        row = aboveRows + 1 + index
+
+        for column, value in enumerate(values):
+            writeValue(worksheet, row, column, value, workbook.style(columnStyle(types[column])[0], border=True))
+
+    start = aboveRows + 2
+    stop = aboveRows + 1 + len(df)
+    writeSubtotals(workbook, worksheet, stop, range(hoursStart, len(types)), start, stop)
+
+    worksheet.insert_image('A1', logoFile, {'image_data': io.BytesIO(logoData())})
+    worksheet.set_landscape()
+
+    return stop
+
+def writeHoursTab(workbook, sheetName, df, approvers=None, locationName=None, billingFrom=None):
+    # streaming version of formatHoursTab
+    worksheet = workbook.add_worksheet(sheetName)
+    writeHeaderInfo(workbook, worksheet, [('Invoice Date:', processingDate), ('Location:', locationName), ('Billing From:', billingFrom)])
+
+    types = ['City', 'SubCLIN', 'Name'] + ['Hours'] * 8
+    stop = writeHoursTable(workbook, worksheet, df, types, 3)
+
+    # one blank row below the subtotals, then the signature lines and the approvers
+    signaturesRow = stop + 2
+    worksheet.merge_range(signaturesRow, 1, signaturesRow, 4, None, workbook.style('signatureLine'))
+    worksheet.merge_range(signaturesRow, 6, signaturesRow, 10, None, workbook.style('signatureLine'))
+
+    signaturesRow += 1
+    worksheet.merge_range(signaturesRow, 1, signaturesRow, 4, approvers['MES'], workbook.style('boldTextCell'))
+    worksheet.merge_range(signaturesRow, 6, signaturesRow, 10, approvers['COR'], workbook.style('boldTextCell'))
+
+    return worksheet
+
+def writeHoursDetailsTab(workbook, sheetName, df, locationName=None, billingFrom=None):
+    # streaming version of formatHoursDetailsTab
+    worksheet = workbook.add_worksheet(sheetName)
+    writeHeaderInfo(workbook, worksheet, [('Report Date:', processingDate), ('Location:', locationName), ('Billing From:', billingFrom)])
+
+    types = ['Date', 'Name'] + ['Hours'] * 8
+    writeHoursTable(workbook, worksheet, df, types, 2)
+
+    return worksheet
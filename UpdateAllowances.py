@@ -1,11 +1,21 @@
 # download the allowance reports from the state department website
+# the pages for every site and every previous rate date are fetched concurrently over one pooled session
+# and kept in cache/allowances.sqlite, so a page for a past date is only ever downloaded once
 
-import requests
 import pandas as pd
-import numpy as np
 import os
+import re
 import sys
 from datetime import datetime
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+from PageCache import PageCache
+
+AllowancesUrl = r'https://aoprals.state.gov/Web920/location_action.asp'
+
+FetchWorkers = 8 # pages requested at the same time
+FetchRetries = 3 # attempts after the first for a page that fails or comes back busy
 
 sites = {
     'Moscow': {
@@ -50,35 +60,120 @@ sites = {
     }
 }
 
-def getPreviousRateDates(countryCode=None, postCode=None):
-    if countryCode is None:
-        # print(f'Country Code is required')
-        return None
-    
-    if postCode is None:
-        # print(f'Post Code is required')
-        return None
-    
-    previous = None
 
-    url = r'https://aoprals.state.gov/Web920/location_action.asp?MenuHide=1'
+def allowancesUrl(countryCode, postCode, effectiveDate=None, baseUrl=None) -> str:
+    url = (baseUrl if baseUrl is not None else AllowancesUrl) + '?MenuHide=1'
     url += f'&CountryCode={countryCode}'
     url += f'&PostCode={postCode}'
 
-    html = requests.get(url).content
-    tables = pd.read_html(html)
+    if effectiveDate is not None:
+        url = url + f'&EffectiveDate={effectiveDate}'
+
+    return url
+
+def allowancesSession(workers=FetchWorkers, retries=FetchRetries):
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    # connections stay open and are shared by the fetching threads, busy or failed pages are retried with a backoff
+    retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=['GET'])
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    return session
+
+def fetchPage(session, url) -> bytes:
+    import requests
+
+    try:
+        response = session.get(url, timeout=60)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        print(f'Could not get {url}: {e}')
+        return None
+
+    return response.content
+
+def fetchPages(session, keys, workers=FetchWorkers, baseUrl=None, cache=None) -> list:
+    # keys are (countryCode, postCode, effectiveDate), the parsed pages are returned in the same order
+    # and None for a page that could not be fetched, every page is parsed once here
+    pages = cache.get(keys) if cache is not None else {}
+    missing = [key for key in dict.fromkeys(keys) if key not in pages]
+    urls = [allowancesUrl(*key, baseUrl=baseUrl) for key in missing]
+
+    if workers <= 1 or len(urls) <= 1:
+        fetched = [fetchPage(session, url) for url in urls]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            fetched = list(executor.map(partial(fetchPage, session), urls))
+
+    fetched = dict(zip(missing, fetched))
+    documents = {key: parsedPage(html) for key, html in fetched.items()}
+
+    if cache is not None:
+        # a page without the rates table, like a maintenance notice, is only kept as long as the current page
+        cache.put({
+            key: (fetched[key], allowancesRows(document) is not None)
+            for key, document in documents.items() if document is not None
+        })
+
+        # an old copy of the current rates is better than none
+        failed = [key for key, document in documents.items() if document is None]
+        pages.update(cache.get(failed, stale=True))
+
+    documents.update({key: parsedPage(html) for key, html in pages.items()})
+
+    return [documents[key] for key in keys]
+
+def pageDocument(html):
+    # the page is parsed once and both the rates and the previous rate dates are read from it
+    from lxml import html as lxmlHtml
+
+    return lxmlHtml.fromstring(html)
+
+def parsedPage(html):
+    # a page that could not be fetched or came back empty has nothing to parse
+    return pageDocument(html) if html is not None and html.strip() != b'' else None
+
+def cellText(cell) -> str:
+    # whitespace is collapsed the same way pd.read_html does it
+    return re.sub(r'[\r\n]+|\s{2,}', ' ', cell.text_content().strip())
+
+def columnValues(rows: list, index: int) -> list:
+    # the values pd.read_html and fillna(0) would give for a column, built in Python because the
+    # tables have a row or two and a DataFrame per column costs more than parsing the page
+    texts = [cells[index] if index < len(cells) else '' for cells in rows]
+
+    try:
+        numbers = [float(text.replace(',', '')) if text != '' else 0.0 for text in texts]
+    except ValueError:
+        return [text if text != '' else 0 for text in texts]
+
+    # whole numbers stay integers unless the column has blanks
+    if all(re.fullmatch(r'[+-]?[\d,]+', text) for text in texts):
+        return [int(number) for number in numbers]
+
+    return numbers
+
+def previousRateDates(document):
+    previous = None
+
+    # look for the string "Previous Rates:" in the first cell of a row
+    searchString = 'Previous Rates:'
 
-    for table in tables:
-        # look for the string "Previous Rates:" in the first column of the table
-        searchString = 'Previous Rates:'
-        data = table.loc[table[0] == searchString]
+    for row in document.iter('tr'):
+        cells = row.xpath('./td|./th')
 
-        if not data.empty:
-            # the second column of the data has a list of dates for the previous rates
+        if len(cells) > 1 and cellText(cells[0]) == searchString:
+            # the second cell has a list of dates for the previous rates
             # they need to be extracted and used to get the previous rates
-            dateString = data.iloc[:, 1].values[0]
+            dateString = cellText(cells[1])
 
-            if dateString is not None:
+            if dateString != '':
                 n = 10
                 previous = [dateString[i:i+n] for i in range(0, len(dateString), n)]
                 break
@@ -88,7 +183,61 @@ def getPreviousRateDates(countryCode=None, postCode=None):
     
     return previous
 
-def getAllowancesData(countryCode=None, postCode=None, effectiveDate=None) -> pd.DataFrame:
+def headerRows(table) -> tuple:
+    # the header and body rows the way pd.read_html splits them: the rows in <thead> whatever their cells are,
+    # or without one the leading rows that only have <th> cells
+    header = table.xpath('./thead/tr')
+    body = table.xpath('./tr|./tbody/tr|./tfoot/tr')
+
+    if len(header) == 0:
+        while len(body) > 0 and len(body[0].xpath('./td')) == 0 and len(body[0].xpath('./th')) > 0:
+            header.append(body.pop(0))
+
+    return header, body
+
+def allowancesRows(document) -> list:
+    # the cell texts of the posts in the table with 'Post Name' in its header, None if no table has one
+    for table in document.iter('table'):
+        header, body = headerRows(table)
+
+        if any(cellText(cell) == 'Post Name' for row in header for cell in row.xpath('./th|./td')):
+            rows = [[cellText(cell) for cell in row.xpath('./th|./td')] for row in body]
+            return [cells for cells in rows if len(cells) > 0]
+
+    return None
+
+def allowancesTable(document, effectiveDate=None) -> pd.DataFrame:
+    # access the table that has a header row with 'Post Name', the rows after it are the posts
+    rows = allowancesRows(document)
+    
+    if rows is None:
+        print(f'No table found with a header row containing "Post Name"')
+        return None
+    
+    # only the post name, post differential and danger pay columns are kept
+    # the effective date is not in the table, so it needs to be added
+    if effectiveDate is None:
+        effectiveDate = pd.to_datetime('today').strftime('%Y-%m-%d')
+    else:
+        # the passed in date needs to be converted to a datetime object
+        effectiveDate = pd.Timestamp(effectiveDate).strftime('%Y-%m-%d')
+
+    df = pd.DataFrame({
+        'EffectiveDate': [effectiveDate] * len(rows),
+        'PostName': columnValues(rows, 0),
+        'PostingRate': columnValues(rows, 2),
+        'DangerRate': columnValues(rows, 5)
+    })
+
+    return df
+
+def parsePreviousRateDates(html):
+    return previousRateDates(pageDocument(html))
+
+def parseAllowances(html, effectiveDate=None) -> pd.DataFrame:
+    return allowancesTable(pageDocument(html), effectiveDate)
+
+def getPreviousRateDates(countryCode=None, postCode=None, session=None, baseUrl=None, cache=None):
     if countryCode is None:
         # print(f'Country Code is required')
         return None
@@ -96,166 +245,311 @@ def getAllowancesData(countryCode=None, postCode=None, effectiveDate=None) -> pd
     if postCode is None:
         # print(f'Post Code is required')
         return None
+
+    document = fetchPages(session if session is not None else allowancesSession(1), [(countryCode, postCode, None)], 1, baseUrl, cache)[0]
+    return previousRateDates(document) if document is not None else None
+
+def getAllowancesData(countryCode=None, postCode=None, effectiveDate=None, session=None, baseUrl=None, cache=None) -> pd.DataFrame:
+    if countryCode is None:
+        # print(f'Country Code is required')
+        return None
     
-    df = None
+    if postCode is None:
+        # print(f'Post Code is required')
+        return None
 
-    url = r'https://aoprals.state.gov/Web920/location_action.asp?MenuHide=1'
-    url += f'&CountryCode={countryCode}'
-    url += f'&PostCode={postCode}'
+    document = fetchPages(session if session is not None else allowancesSession(1), [(countryCode, postCode, effectiveDate)], 1, baseUrl, cache)[0]
+    return allowancesTable(document, effectiveDate) if document is not None else None
 
-    if effectiveDate is not None:
-        url = url + f'&EffectiveDate={effectiveDate}'
+def copyOf(df: pd.DataFrame) -> pd.DataFrame:
+    # the same page is merged more than once, each merge gets its own frame
+    return df.copy() if df is not None else None
 
-    html = requests.get(url).content
-    tables = pd.read_html(html)
+class RateInterval:
+    # the span of dates a post has rates for, with the rows at both ends of it, so checking whether a date
+    # is already covered or whether fetched rates changed does not have to search the rows of the post
+    def __init__(self):
+        self.rows = 0
+        self.oldest = None # (effectiveDate, index, values) of the first row with the earliest date
+        self.newest = None # the same for the first row with the latest date
 
-    # access the table that has a header row with 'Post Name'
-    for table in tables:
-        if 'Post Name' in table.columns:
-            df = table
-            break
-    
-    if df is None:
-        print(f'No table found with a header row containing "Post Name"')
-        return None
-    
-    # df has the table with the relevant information
-    # name the columns to make it easier to reference them
-    df.columns = ['PostName', 'COLA', 'PostingRate', 'TransferZone', 'Footnote', 'DangerRate', 'EducationAllowance', 'LivingAllowance', 'ReportingSchedule']
-    df = df.fillna(0)
+    @classmethod
+    def fromRows(cls, rows: pd.DataFrame, valueColumns: list):
+        interval = cls()
 
-    # the effective date is not in the table, so it needs to be added
-    # if effectiveDate is not None and df['EffectiveDate'] is None:
+        for index, effectiveDate, values in zip(rows.index, rows['EffectiveDate'], rows[valueColumns].itertuples(index=False, name=None)):
+            interval.add(effectiveDate, index, values)
+
+        return interval
+
+    def add(self, effectiveDate: str, index, values: tuple):
+        # the dates are compared as YYYY-MM-DD strings
+        self.rows += 1
+
+        if self.oldest is None or effectiveDate < self.oldest[0]:
+            self.oldest = (effectiveDate, index, values)
+
+        if self.newest is None or effectiveDate > self.newest[0]:
+            self.newest = (effectiveDate, index, values)
+
+    def covers(self, effectiveDate: str) -> bool:
+        return self.rows > 0 and self.oldest[0] <= effectiveDate <= self.newest[0]
+
+class SiteRates:
+    # the stored rates split up by post, so merging the pages for a site only looks at the rows of that post
+    # new rows are added to their post, and the whole table is put back together once when it is saved
+    def __init__(self, ratesData: pd.DataFrame = None):
+        self.columns = ['EffectiveDate', 'PostName', 'PostingRate', 'DangerRate']
+        self.sites = {}
+        self.intervals = {}
+
+        if ratesData is not None:
+            self.columns = list(ratesData.columns)
+
+            for postName, rows in ratesData.groupby('PostName', sort=False, dropna=False):
+                self.sites[postName] = rows.reset_index(drop=True)
+                self.intervals[postName] = RateInterval.fromRows(self.sites[postName], self.valueColumns())
+
+    def valueColumns(self) -> list:
+        return [column for column in self.columns if column != 'EffectiveDate']
+
+    def interval(self, site: str) -> RateInterval:
+        return self.intervals[site] if site in self.intervals else RateInterval()
+
+    def add(self, df: pd.DataFrame):
+        if df is None:
+            return
+
+        for postName, rows in df.groupby('PostName', sort=False, dropna=False):
+            first = 0
+
+            if postName in self.sites:
+                first = len(self.sites[postName])
+                rows = pd.concat([self.sites[postName], rows], ignore_index=True)
+            else:
+                self.intervals[postName] = RateInterval()
+
+            self.sites[postName] = rows.reset_index(drop=True)
+
+            added = self.sites[postName].iloc[first:]
+            for index, effectiveDate, values in zip(added.index, added['EffectiveDate'], added[self.valueColumns()].itertuples(index=False, name=None)):
+                self.intervals[postName].add(effectiveDate, index, values)
+
+    def setEffectiveDate(self, site: str, index, effectiveDate: str):
+        self.sites[site].loc[index, 'EffectiveDate'] = effectiveDate
+        interval = self.intervals[site]
+
+        # moving the newest row later or the oldest row earlier keeps them at the ends
+        if index == interval.newest[1] and index != interval.oldest[1] and effectiveDate >= interval.newest[0]:
+            interval.newest = (effectiveDate, index, interval.newest[2])
+        elif index == interval.oldest[1] and index != interval.newest[1] and effectiveDate <= interval.oldest[0]:
+            interval.oldest = (effectiveDate, index, interval.oldest[2])
+        else:
+            self.intervals[site] = RateInterval.fromRows(self.sites[site], self.valueColumns())
+
+    def data(self) -> pd.DataFrame:
+        # a page merged more than once leaves repeated rows behind, the last one for a post and date is kept
+        ratesData = pd.concat(list(self.sites.values()), ignore_index=True) if len(self.sites) > 0 else pd.DataFrame(columns=self.columns)
+        ratesData = ratesData.drop_duplicates(subset=['PostName', 'EffectiveDate'], keep='last')
+
+        return ratesData.sort_values(by=['PostName', 'EffectiveDate'], ascending=[True, False], ignore_index=True)
+
+    def save(self, ratesFile: str) -> pd.DataFrame:
+        ratesData = self.data()
+
+        # write to a temporary file first so that an interrupted update leaves the old file in place
+        temporary = f'{ratesFile}.{os.getpid()}.tmp'
+        ratesData.to_csv(temporary, index=False)
+        os.replace(temporary, ratesFile)
+
+        return ratesData
+
+def fetchedRates(df: pd.DataFrame, valueColumns: list) -> tuple:
+    # the effective date and the values of the first row of a fetched page, to compare with an end of a RateInterval
+    return df['EffectiveDate'].iloc[0], tuple(df[valueColumns].iloc[0])
+
+def mergeCurrentRates(rates: SiteRates, site: str, current: pd.DataFrame, now: str):
+    if rates.interval(site).rows < 2:
+        # force a second data point to be added to capture the range of dates
+        print(f'Getting data for {site}')
+        rates.add(copyOf(current))
+
+    interval = rates.interval(site)
+
+    if interval.rows == 0:
+        print(f'No data found for {site}')
+        print(current)
+        rates.add(copyOf(current))
 
-    if effectiveDate is None:
-        effectiveDate = pd.to_datetime('today').strftime('%Y-%m-%d')
     else:
-        # the passed in date needs to be converted to a datetime object
-        effectiveDate = pd.to_datetime(effectiveDate).strftime('%Y-%m-%d')
+        # we have some data for this site, did it change from the last time we checked?
+        newestDate, newestIndex, newestValues = interval.newest
 
-    df['EffectiveDate'] = effectiveDate
+        if now > newestDate and current is not None and len(current) > 0:
+            print(f'Getting data for {site}')
+            effectiveDate, values = fetchedRates(current, rates.valueColumns())
 
-    df = df[['EffectiveDate', 'PostName', 'PostingRate', 'DangerRate']]
-    return df
+            if values == newestValues and effectiveDate == newestDate:
+                pass
+            elif values == newestValues:
+                # update the newest rates with today's date
+                rates.setEffectiveDate(site, newestIndex, now)
+            else:
+                # add the new data to the rates
+                rates.add(copyOf(current))
 
-# main function
-if __name__ == '__main__':
+def neededRateDates(interval: RateInterval, previousDates: list, earliestRateData, now: str) -> list:
+    # the previous rate dates mergePreviousRates will ask for, the ones the stored rates for the site do not cover
+    covered = interval
+
+    if interval.rows < 2:
+        # mergePreviousRates adds the current rates again, dated today
+        covered = RateInterval()
+
+        if interval.rows > 0:
+            covered.add(interval.oldest[0], None, None)
+            covered.add(interval.newest[0], None, None)
+            covered.add(now, None, None)
+
+    needed = []
+
+    for date in previousDates:
+        if pd.Timestamp(date) <= earliestRateData:
+            break
+
+        if not covered.covers(pd.Timestamp(date).strftime('%Y-%m-%d')):
+            needed.append(date)
+
+    return needed
+
+def ratesOnDate(site: str, date: str, previousRates: dict, baseUrl=None) -> pd.DataFrame:
+    if date in previousRates:
+        return copyOf(previousRates[date])
+
+    # not expected, neededRateDates lists every date that is looked up
+    return getAllowancesData(sites[site]['countryCode'], sites[site]['postCode'], date, baseUrl=baseUrl)
+
+def mergePreviousRates(rates: SiteRates, site: str, previousDates: list, current: pd.DataFrame, previousRates: dict, earliestRateData, baseUrl=None):
+    # previousRates has the fetched rates for each date neededRateDates listed
+    for date in previousDates:
+        if pd.Timestamp(date) <= earliestRateData:
+            break
+
+        if rates.interval(site).rows < 2:
+            # force a second data point to be added to capture the range of dates
+            print(f'Getting data for {site}')
+            rates.add(copyOf(current))
+
+        interval = rates.interval(site)
+        dateFormatted = pd.Timestamp(date).strftime('%Y-%m-%d')
+
+        if interval.rows == 0:
+            print(f'No data found for {site}')
+            rates.add(ratesOnDate(site, date, previousRates, baseUrl))
+
+        elif not interval.covers(dateFormatted):
+            df = ratesOnDate(site, date, previousRates, baseUrl)
+
+            if df is not None and len(df) > 0:
+                oldestDate, oldestIndex, oldestValues = interval.oldest
+                effectiveDate, values = fetchedRates(df, rates.valueColumns())
+
+                if values == oldestValues and effectiveDate == oldestDate:
+                    pass
+                elif values == oldestValues:
+                    rates.setEffectiveDate(site, oldestIndex, dateFormatted)
+                else:
+                    rates.add(df)
+
+def updateAllowances(ratesFile: str, workers=FetchWorkers, baseUrl=None, useCache=True) -> pd.DataFrame:
     ratesData = None
     earliestRateData = pd.to_datetime('2023-01-01')
 
-    ratesFile = sys.argv[1] if len(sys.argv) > 1 else 'data/AllowanceRates.csv'
-
     # load existing data if the file exists
     if os.path.exists(ratesFile):
         # print(f'reading from {ratesFile}')
         ratesData = pd.read_csv(ratesFile)
         ratesData.sort_values(by='EffectiveDate', inplace=True)
-    
-    # print(f'Starting with data:')
-    # print(ratesData)
+
+    rates = SiteRates(ratesData)
+    started = ratesData is not None
 
     # create a timestamp for today
     now = datetime.now().strftime('%Y-%m-%d')
-    nowDatetime = pd.to_datetime(now)
 
-    for site in sites:
-        print(f'Checking data for {site}')
+    session = allowancesSession(workers)
 
-        countryCode = sites[site]['countryCode']
-        postCode = sites[site]['postCode']
+    # pages for past dates are only ever fetched once, the current pages once they are out of date
+    cache = PageCache() if useCache else None
 
-        # is this the first time we are getting data for any site?
-        if ratesData is None:
-            print(f'Getting data for {site}')
-            ratesData = getAllowancesData(countryCode, postCode)
+    # the current page of a site has its rates and the dates its previous rates can be fetched for
+    print(f'Getting current rates for {len(sites)} sites')
+    pages = fetchPages(session, [(site['countryCode'], site['postCode'], None) for site in sites.values()], workers, baseUrl, cache)
+
+    current = {}
+    previousDates = {}
+
+    for site, document in zip(sites, pages):
+        if document is None:
+            current[site] = None
+            previousDates[site] = []
             continue
 
-        siteData = ratesData.loc[ratesData['PostName'] == site] if ratesData is not None else None
+        current[site] = allowancesTable(document)
+        previousDates[site] = previousRateDates(document) or []
 
-        if len(siteData) < 2:
-            # force a second data point to be added to capture the range of dates
-            print(f'Getting data for {site}')
-            df = getAllowancesData(countryCode, postCode)
-            ratesData = pd.concat([ratesData, df], ignore_index=True)
-            siteData = ratesData.loc[ratesData['PostName'] == site]
+    historySites = []
 
-        newest = siteData.loc[siteData['EffectiveDate'] == siteData['EffectiveDate'].max()]
+    for site in sites:
+        print(f'Checking data for {site}')
 
-        if newest.empty:
-            print(f'No data found for {site}')
-            df = getAllowancesData(countryCode, postCode)
-            print(df)
-            ratesData = pd.concat([ratesData, df], ignore_index=True)
+        # is this the first time we are getting data for any site?
+        if not started:
+            print(f'Getting data for {site}')
+            rates.add(copyOf(current[site]))
+            started = current[site] is not None
+            continue
 
-        else:
-            # we have some data for this site, did it change from the last time we checked?
-            newestIndex = newest.index[0]
-            newestDate = pd.to_datetime(newest['EffectiveDate'].values[0])
+        mergeCurrentRates(rates, site, current[site], now)
+        historySites.append(site)
 
-            if nowDatetime > newestDate:
-                print(f'Getting data for {site}')
-                df = getAllowancesData(countryCode, postCode)
+    # every previous rate page any site needs is fetched in one batch
+    needed = [
+        (site, date) for site in historySites
+        for date in neededRateDates(rates.interval(site), previousDates[site], earliestRateData, now)
+    ]
 
-                if df is not None:
-                    comparison = np.where(df.values == newest.values, True, False)
+    if len(needed) > 0:
+        print(f'Getting {len(needed)} previous rates')
 
-                    if comparison.all():
-                        pass
-                    elif comparison[0][1] and comparison[0][2] and comparison[0][3]:
-                        # update the newest ratesData with today's date
-                        ratesData.loc[newestIndex, 'EffectiveDate'] = now
-                    else:
-                        # add the new data to the ratesData
-                        ratesData = pd.concat([ratesData, df], ignore_index=True)
+    keys = [(sites[site]['countryCode'], sites[site]['postCode'], date) for site, date in needed]
+    pages = fetchPages(session, keys, workers, baseUrl, cache)
 
-        previousDates = getPreviousRateDates(countryCode, postCode)
+    previousRates = {site: {} for site in historySites}
 
-        for date in previousDates:
-            datetime = pd.to_datetime(date)
+    for (site, date), document in zip(needed, pages):
+        previousRates[site][date] = allowancesTable(document, date) if document is not None else None
 
-            if datetime <= earliestRateData:
-                break
+    for site in historySites:
+        mergePreviousRates(rates, site, previousDates[site], current[site], previousRates[site], earliestRateData, baseUrl)
+
+    if not started:
+        print(f'No rates to save to {ratesFile}')
+        return None
 
-            siteData = ratesData.loc[ratesData['PostName'] == site]
+    # the file is written once, with every change made above
+    return rates.save(ratesFile)
 
-            if len(siteData) < 2:
-                # force a second data point to be added to capture the range of dates
-                print(f'Getting data for {site}')
-                df = getAllowancesData(countryCode, postCode)
-                ratesData = pd.concat([ratesData, df], ignore_index=True)
-                siteData = ratesData.loc[ratesData['PostName'] == site]
+# main function
+if __name__ == '__main__':
+    from Jobs import parseJobs, parseNoCache
 
-            newest = siteData.loc[siteData['EffectiveDate'] == siteData['EffectiveDate'].max()]
-            newestDate = pd.to_datetime(newest['EffectiveDate'].values[0]) if not newest.empty else nowDatetime
+    # --jobs N sets how many pages are fetched at the same time
+    workers, arguments = parseJobs(sys.argv[1:], FetchWorkers)
 
-            oldest = siteData.loc[siteData['EffectiveDate'] == siteData['EffectiveDate'].min()]
-            oldestDate = pd.to_datetime(oldest['EffectiveDate'].values[0]) if not oldest.empty else nowDatetime
+    # --no-cache fetches every page again instead of the stored copies
+    useCache, arguments = parseNoCache(arguments)
 
-            if oldest.empty:
-                print(f'No data found for {site}')
-                df = getAllowancesData(countryCode, postCode, date)
-                ratesData = pd.concat([ratesData, df], ignore_index=True)
-            else:
-                oldestIndex = oldest.index[0]
+    ratesFile = arguments[0] if len(arguments) > 0 else 'data/AllowanceRates.csv'
 
-                if datetime <= newestDate and datetime >= oldestDate:
-                    pass
-                else:
-                    df = getAllowancesData(countryCode, postCode, date)
-
-                    if df is not None:
-                        dateFormatted = pd.to_datetime(date).strftime('%Y-%m-%d')
-                        comparison = np.where(df.values == oldest.values, True, False)
-
-                        if comparison.all():
-                            pass
-                        elif comparison[0][1] and comparison[0][2] and comparison[0][3]:
-                            ratesData.loc[oldestIndex, 'EffectiveDate'] = dateFormatted
-                        else:
-                            ratesData = pd.concat([ratesData, df], ignore_index=True)
-
-            # save the data to a file
-            ratesData.sort_values(by=['PostName', 'EffectiveDate'], ascending=[True, False] ,inplace=True)
-            
-            with open(ratesFile, 'w') as file:
-                ratesData.to_csv(file, index=False)
\ No newline at end of file
+    updateAllowances(ratesFile, workers, useCache=useCache)
@@ -0,0 +1,191 @@
+#!/usr/local/bin/python
+# Finds the cells that differ between two worksheets by comparing their values as DataFrames.
+# Sheets are compared either cell by cell at the same position, or by matching rows on
+# key columns (e.g. Date, EmployeeName, TaskName) so inserted or reordered rows line up.
+# Coordinates are 1-based (row, column) pairs, the same as worksheet.cell() takes.
+import numpy as np
+import pandas as pd
+
+def sheetFrame(worksheet) -> pd.DataFrame:
+	# every cell value in one pass, frame row/column i is sheet row/column i + 1
+	return pd.DataFrame(list(worksheet.values), dtype=object)
+
+def differs(values1, values2):
+	# empty cells compare equal to each other
+	return values1.ne(values2) & ~(values1.isna() & values2.isna())
+
+def diffPositions(frame1, frame2) -> list:
+	rows = max(frame1.shape[0], frame2.shape[0])
+	columns = max(frame1.shape[1], frame2.shape[1])
+
+	values1 = frame1.reindex(index=range(rows), columns=range(columns))
+	values2 = frame2.reindex(index=range(rows), columns=range(columns))
+
+	rowIndex, columnIndex = np.nonzero(differs(values1, values2).to_numpy())
+	return [(int(row) + 1, int(column) + 1) for row, column in zip(rowIndex, columnIndex)]
+
+# columns diffKeyed adds to the data or the merge, a header with one of these names is renamed like a repeat
+ReservedNames = ['SheetRow', 'Occurrence', 'SheetRow_1', 'SheetRow_2', '_merge']
+
+def headerNames(frame, headerRow) -> list:
+	# the header row as unique names, the way pd.read_excel names them: a blank cell becomes 'Unnamed: N'
+	# with N its 0-based column and a repeated name gets '.1', '.2', ... so 'Hours', 'Hours' is 'Hours', 'Hours.1'
+	names = []
+	used = set(ReservedNames)
+
+	for index, value in enumerate(frame.iloc[headerRow - 1]):
+		name = f'Unnamed: {index}' if pd.isna(value) or str(value).strip() == '' else str(value)
+		unique = name
+		count = 0
+
+		while unique in used:
+			count += 1
+			unique = f'{name}.{count}'
+
+		used.add(unique)
+		names.append(unique)
+
+	return names
+
+def keyedFrame(frame, headerRow) -> pd.DataFrame:
+	data = frame.iloc[headerRow:].copy()
+	data.columns = headerNames(frame, headerRow)
+	data['SheetRow'] = data.index + 1
+	return data
+
+def diffKeyed(frame1, frame2, keys, headerRow=1) -> tuple:
+	data1 = keyedFrame(frame1, headerRow)
+	data2 = keyedFrame(frame2, headerRow)
+
+	for data in [data1, data2]:
+		missing = [key for key in keys if key not in data.columns]
+		if len(missing) > 0:
+			raise KeyError(f'key columns {missing} are not in header row {headerRow}')
+
+		# repeated keys are matched in the order they appear
+		data['Occurrence'] = data.groupby(keys, dropna=False, sort=False).cumcount()
+
+	positions1 = {name: index + 1 for index, name in enumerate(data1.columns[:frame1.shape[1]])}
+	positions2 = {name: index + 1 for index, name in enumerate(data2.columns[:frame2.shape[1]])}
+	compared = [name for name in positions1 if name in positions2 and name not in keys]
+
+	# only the keys and sheet rows are merged, the compared columns are then looked up by sheet row
+	# so no header name needs a suffix
+	matching = keys + ['Occurrence', 'SheetRow']
+	merged = data1[matching].merge(data2[matching], on=keys + ['Occurrence'], how='outer', suffixes=('_1', '_2'), indicator=True)
+	both = merged.loc[merged['_merge'] == 'both']
+	rows1 = both['SheetRow_1'].astype(int).to_numpy()
+	rows2 = both['SheetRow_2'].astype(int).to_numpy()
+
+	values1 = data1.set_index('SheetRow').loc[rows1, compared].reset_index(drop=True)
+	values2 = data2.set_index('SheetRow').loc[rows2, compared].reset_index(drop=True)
+	changed = differs(values1, values2).to_numpy()
+
+	coordinates1 = []
+	coordinates2 = []
+
+	for index, name in enumerate(compared):
+		coordinates1 += [(int(row), positions1[name]) for row in rows1[changed[:, index]]]
+		coordinates2 += [(int(row), positions2[name]) for row in rows2[changed[:, index]]]
+
+	# rows that only one sheet has are different in every column
+	for row in merged.loc[merged['_merge'] == 'left_only', 'SheetRow_1']:
+		coordinates1 += [(int(row), column) for column in range(1, frame1.shape[1] + 1)]
+
+	for row in merged.loc[merged['_merge'] == 'right_only', 'SheetRow_2']:
+		coordinates2 += [(int(row), column) for column in range(1, frame2.shape[1] + 1)]
+
+	return sorted(coordinates1), sorted(coordinates2)
+
+def diffSheets(worksheet1, worksheet2, keys=None, headerRow=1) -> tuple:
+	# returns the differing coordinates in the first sheet and in the second
+	frame1 = sheetFrame(worksheet1)
+	frame2 = sheetFrame(worksheet2)
+
+	if keys is None:
+		coordinates = diffPositions(frame1, frame2)
+		return coordinates, coordinates
+
+	return diffKeyed(frame1, frame2, keys, headerRow)
+
+if __name__ == '__main__':
+	import os
+	import sys
+	from openpyxl import load_workbook
+	from openpyxl.utils import get_column_letter
+	from InvoiceFormat import highlightCells
+
+	keys = None
+	headerRow = 1
+	highlight = False
+	arguments = []
+
+	index = 1
+	while index < len(sys.argv):
+		if sys.argv[index] == '--keys' and index + 1 < len(sys.argv):
+			keys = sys.argv[index + 1].split(',')
+			index += 2
+		elif sys.argv[index] == '--header' and index + 1 < len(sys.argv):
+			headerRow = int(sys.argv[index + 1])
+			index += 2
+		elif sys.argv[index] == '--highlight':
+			highlight = True
+			index += 1
+		else:
+			arguments.append(sys.argv[index])
+			index += 1
+
+	if len(arguments) != 2:
+		print(f'Usage: {sys.argv[0]} [--keys Date,EmployeeName,TaskName [--header N]] [--highlight] <first workbook> <second workbook>')
+		print('  --keys       match rows on these header columns instead of by position')
+		print('  --header     the row holding the column names (default: 1)')
+		print('  --highlight  save copies of both workbooks with the differences filled yellow')
+		sys.exit(1)
+
+	workbook1 = load_workbook(arguments[0])
+	workbook2 = load_workbook(arguments[1])
+
+	for sheetName in workbook1.sheetnames:
+		if sheetName not in workbook2.sheetnames:
+			print(f'{sheetName}: only in {arguments[0]}')
+	for sheetName in workbook2.sheetnames:
+		if sheetName not in workbook1.sheetnames:
+			print(f'{sheetName}: only in {arguments[1]}')
+
+	totalDifferences = 0
+
+	for sheetName in [name for name in workbook1.sheetnames if name in workbook2.sheetnames]:
+		worksheet1 = workbook1[sheetName]
+		worksheet2 = workbook2[sheetName]
+
+		try:
+			coordinates1, coordinates2 = diffSheets(worksheet1, worksheet2, keys, headerRow)
+		except KeyError as error:
+			print(f'{sheetName}: skipped, {error.args[0]}')
+			continue
+
+		differences = max(len(coordinates1), len(coordinates2))
+		totalDifferences += differences
+		print(f'{sheetName}: {differences} differing cells')
+
+		if keys is None:
+			for row, column in coordinates1:
+				cell = f'{get_column_letter(column)}{row}'
+				print(f'  {cell}: {worksheet1.cell(row=row, column=column).value!r} -> {worksheet2.cell(row=row, column=column).value!r}')
+		else:
+			for row, column in coordinates1:
+				print(f'  - {get_column_letter(column)}{row}: {worksheet1.cell(row=row, column=column).value!r}')
+			for row, column in coordinates2:
+				print(f'  + {get_column_letter(column)}{row}: {worksheet2.cell(row=row, column=column).value!r}')
+
+		if highlight:
+			highlightCells(worksheet1, coordinates1)
+			highlightCells(worksheet2, coordinates2)
+
+	if highlight:
+		for filename, workbook in [(arguments[0], workbook1), (arguments[1], workbook2)]:
+			outputFile = f'{os.path.splitext(filename)[0]}-diff.xlsx'
+			workbook.save(outputFile)
+			print(f'Saved {outputFile}')
+
+	sys.exit(1 if totalDifferences > 0 else 0)
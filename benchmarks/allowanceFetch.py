@@ -0,0 +1,137 @@
+#!/usr/local/bin/python
+# Runs updateAllowances against a local stand-in for the allowances website that serves canned
+# pages with a delay, and turns the first request for some pages away as busy so the retries
+# are exercised. The rates written with one connection and with several have to be the same.
+# A second update with the page cache shows what running the updater again costs.
+# Run from the repository root: python benchmarks/allowanceFetch.py [delay ms] [workers]
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import time as timer
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from UpdateAllowances import sites, updateAllowances
+
+# the dates each post lists under "Previous Rates:", newest first
+PreviousDates = ['01/20/2024', '10/01/2023', '06/11/2023', '01/15/2023', '09/04/2022', '03/13/2022']
+
+def postName(countryCode: str, postCode: str) -> str:
+	for site, codes in sites.items():
+		if str(codes['countryCode']) == countryCode and str(codes['postCode']) == postCode:
+			return site
+
+	return None
+
+def ratesFor(site: str, date: str) -> tuple:
+	# the rates change on some of the dates and stay the same on the others
+	period = PreviousDates.index(date) // 2 if date is not None else -1
+	seed = sum(ord(character) for character in site)
+
+	return 5 * ((seed + period) % 7), 5 * ((seed // 3 + period) % 3)
+
+def allowancesPage(site: str, date: str) -> str:
+	postingRate, dangerRate = ratesFor(site, date)
+	headers = ['Post Name', 'COLA', 'Post Differential', 'Transfer Zone', 'Footnote', 'Danger Pay', 'Education Allowance', 'Living Quarters', 'Reporting Schedule']
+	values = [site, 10, postingRate, '', '', dangerRate, '', 123, '']
+
+	return (
+		'<html><body>'
+		f'<table><tr><td>Post:</td><td>{site}</td></tr><tr><td>Previous Rates:</td><td>{"".join(PreviousDates)}</td></tr></table>'
+		'<table><thead><tr>' + ''.join(f'<th>{header}</th>' for header in headers) + '</tr></thead>'
+		'<tbody><tr>' + ''.join(f'<td>{value}</td>' for value in values) + '</tr></tbody></table>'
+		'</body></html>'
+	)
+
+class StandInHandler(BaseHTTPRequestHandler):
+	delay = 0.05
+	busy = set()	# pages that were already turned away once
+	lock = threading.Lock()
+	requests = 0
+
+	def do_GET(self):
+		query = parse_qs(urlparse(self.path).query)
+		site = postName(query['CountryCode'][0], query['PostCode'][0])
+		date = query['EffectiveDate'][0] if 'EffectiveDate' in query else None
+
+		with StandInHandler.lock:
+			StandInHandler.requests += 1
+			turnAway = hash((site, date)) % 4 == 0 and (site, date) not in StandInHandler.busy
+			StandInHandler.busy.add((site, date))
+
+		timer.sleep(StandInHandler.delay)
+
+		if turnAway:
+			self.send_response(503)
+			self.end_headers()
+			return
+
+		body = allowancesPage(site, date).encode()
+		self.send_response(200)
+		self.send_header('Content-Type', 'text/html')
+		self.send_header('Content-Length', str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, format, *arguments):
+		pass
+
+def startingRates(filename: str):
+	# a few sites with stored rates, the others are new
+	rows = []
+
+	for site in list(sites.keys())[:4]:
+		postingRate, dangerRate = ratesFor(site, '10/01/2023')
+		rows.append({'EffectiveDate': '2023-10-01', 'PostName': site, 'PostingRate': postingRate, 'DangerRate': dangerRate})
+
+	pd.DataFrame(rows).to_csv(filename, index=False)
+
+def timedUpdate(baseUrl: str, directory: str, workers: int, useCache=False) -> tuple:
+	ratesFile = os.path.join(directory, f'AllowanceRates-{workers}.csv')
+	startingRates(ratesFile)
+
+	StandInHandler.busy = set()
+	StandInHandler.requests = 0
+
+	start = timer.perf_counter()
+	updateAllowances(ratesFile, workers, baseUrl=baseUrl, useCache=useCache)
+	seconds = timer.perf_counter() - start
+
+	return pd.read_csv(ratesFile), seconds, StandInHandler.requests
+
+if __name__ == '__main__':
+	StandInHandler.delay = (int(sys.argv[1]) if len(sys.argv) > 1 else 50) / 1000
+	workers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+	server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+	baseUrl = f'http://127.0.0.1:{server.server_address[1]}/Web920/location_action.asp'
+
+	directory = tempfile.mkdtemp()
+
+	try:
+		serial, serialSeconds, serialRequests = timedUpdate(baseUrl, directory, 1)
+		concurrent, concurrentSeconds, concurrentRequests = timedUpdate(baseUrl, directory, workers)
+
+		# the page cache is kept in the working directory
+		os.chdir(directory)
+		timedUpdate(baseUrl, directory, workers, useCache=True)
+		cached, cachedSeconds, cachedRequests = timedUpdate(baseUrl, directory, workers, useCache=True)
+	finally:
+		server.shutdown()
+		shutil.rmtree(directory)
+
+	# the pages come back in a different order with several connections, the rates written have to be the same
+	assert serial.equals(concurrent), f'rates with {workers} connections differ from 1 connection'
+	assert serial.equals(cached), 'rates from the page cache differ from the fetched ones'
+
+	print(f'\n{len(sites)} sites, {StandInHandler.delay * 1000:.0f}ms per page')
+	print(f'1 connection:   {serialSeconds:.2f}s, {serialRequests} requests')
+	print(f'{workers} connections: {concurrentSeconds:.2f}s, {concurrentRequests} requests')
+	print(f'speedup:        {serialSeconds / concurrentSeconds:.1f}x')
+	print(f'cached again:   {cachedSeconds:.2f}s, {cachedRequests} requests')
@@ -0,0 +1,102 @@
+#!/usr/local/bin/python
+# Times reading the rates and the previous rate dates out of allowance pages with one lxml parse,
+# against pd.read_html building a DataFrame for every table on the page, once for each of the two.
+# The pages are the ones saved in a page cache database, or synthetic ones shaped like them.
+# Run from the repository root: python benchmarks/allowanceParse.py [cache/allowances.sqlite] [rounds]
+import os
+import sys
+import sqlite3
+import time as timer
+from contextlib import closing
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from UpdateAllowances import sites, pageDocument, allowancesTable, previousRateDates
+from allowanceFetch import PreviousDates, allowancesPage
+
+def legacyPreviousRateDates(html):
+	# the pd.read_html version this replaced
+	previous = None
+
+	for table in pd.read_html(html):
+		if 0 not in table.columns:
+			continue
+
+		data = table.loc[table[0] == 'Previous Rates:']
+
+		if not data.empty:
+			dateString = data.iloc[:, 1].values[0]
+
+			if dateString is not None:
+				previous = [dateString[i:i+10] for i in range(0, len(dateString), 10)]
+				break
+
+	return previous
+
+def legacyAllowances(html, effectiveDate) -> pd.DataFrame:
+	df = None
+
+	for table in pd.read_html(html):
+		if 'Post Name' in table.columns:
+			df = table
+			break
+
+	df.columns = ['PostName', 'COLA', 'PostingRate', 'TransferZone', 'Footnote', 'DangerRate', 'EducationAllowance', 'LivingAllowance', 'ReportingSchedule']
+	df = df.fillna(0)
+	df['EffectiveDate'] = pd.to_datetime(effectiveDate).strftime('%Y-%m-%d')
+
+	return df[['EffectiveDate', 'PostName', 'PostingRate', 'DangerRate']]
+
+def samplePage(site: str, date: str) -> bytes:
+	# the real pages wrap the two tables in layout tables and follow them with the footnotes
+	navigation = '<table>' + ''.join(f'<tr><td><a href="#">Menu {number}</a></td></tr>' for number in range(20)) + '</table>'
+	footnotes = '<table>' + ''.join(f'<tr><td>{number}</td><td>Footnote text for note {number} of the post</td></tr>' for number in range(40)) + '</table>'
+	page = allowancesPage(site, date).replace('<body>', f'<body>{navigation}').replace('</body>', f'{footnotes}</body>')
+
+	return page.encode()
+
+def savedPages(filename: str) -> list:
+	with closing(sqlite3.connect(filename)) as db:
+		rows = db.execute("SELECT effectiveDate, content FROM pages").fetchall()
+
+	return [(effectiveDate if effectiveDate != '' else None, content) for effectiveDate, content in rows]
+
+def parsePages(pages, parse) -> tuple:
+	start = timer.perf_counter()
+	results = [parse(html, effectiveDate) for effectiveDate, html in pages]
+
+	return results, timer.perf_counter() - start
+
+def parsed(html, effectiveDate) -> tuple:
+	document = pageDocument(html)
+	return allowancesTable(document, effectiveDate), previousRateDates(document)
+
+def legacyParsed(html, effectiveDate) -> tuple:
+	return legacyAllowances(html, effectiveDate), legacyPreviousRateDates(html)
+
+if __name__ == '__main__':
+	if len(sys.argv) > 1 and os.path.exists(sys.argv[1]):
+		pages = savedPages(sys.argv[1])
+	else:
+		pages = [(date, samplePage(site, date)) for site in sites for date in PreviousDates]
+
+	rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+	# the current pages are dated today, so both parsers are given a date for them
+	pages = [(effectiveDate if effectiveDate is not None else '01/01/2024', html) for effectiveDate, html in pages]
+
+	legacySeconds = min(parsePages(pages, legacyParsed)[1] for round in range(rounds))
+	seconds = min(parsePages(pages, parsed)[1] for round in range(rounds))
+
+	legacyResults = parsePages(pages, legacyParsed)[0]
+	results = parsePages(pages, parsed)[0]
+
+	for (effectiveDate, html), (rates, dates), (legacyRates, legacyDates) in zip(pages, results, legacyResults):
+		assert rates.equals(legacyRates), f'rates for {effectiveDate} differ from pd.read_html'
+		assert dates == legacyDates, f'previous rate dates for {effectiveDate} differ from pd.read_html: {dates} != {legacyDates}'
+
+	print(f'\n{len(pages)} pages, {sum(len(html) for effectiveDate, html in pages) / len(pages) / 1024:.1f}KB each')
+	print(f'pd.read_html twice: {legacySeconds * 1000 / len(pages):.2f}ms per page')
+	print(f'one lxml parse:     {seconds * 1000 / len(pages):.2f}ms per page')
+	print(f'speedup:            {legacySeconds / seconds:.1f}x')
@@ -0,0 +1,85 @@
+#!/usr/local/bin/python
+# Times formatTimeByDate on a large synthetic Status "Date" sheet and compares the
+# column-at-a-time styleColumn with the per-cell loop it replaced.
+# Run from the repository root: python benchmarks/formatting.py [rows] [legacy rows]
+import io
+import os
+import sys
+import time as timer
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from InvoiceStyles import styles
+from Config import getConfig
+from InvoiceFormat import formatTimeByDate, styleColumn
+
+HoursColumns = [
+	'Regular', 'LocalHoliday', 'Admin', 'Holiday', 'Vacation', 'Bereavement', 'Overtime',
+	'On-callOT', 'ScheduledOT', 'UnscheduledOT', 'HoursReg', 'HoursOT', 'HoursTotal'
+]
+
+def statusFrame(rows, seed=0) -> pd.DataFrame:
+	# same layout as Status.py writes for the Date sheet
+	rng = np.random.default_rng(seed)
+
+	data = {
+		'Date': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 31, rows), unit='D'),
+		'EmployeeName': [f'Employee {number}' for number in rng.integers(0, 500, rows)],
+		'SubCLIN': rng.choice(['001', '002', '003'], rows),
+		'State': rng.choice(['Approved', 'Approved', 'Approved', 'Submitted', 'Draft', 'Declined'], rows)
+	}
+
+	for column in HoursColumns:
+		data[column] = rng.choice([0.0, 0.0, 8.0, 4.5], rows)
+
+	return pd.DataFrame(data)
+
+def statusWorksheet(df):
+	writer = pd.ExcelWriter(io.BytesIO(), engine='openpyxl')
+	# laid out the way Status.py writes it, row 1 is left free for the subtotals
+	df.to_excel(writer, sheet_name='Date', startrow=1, index=False)
+
+	workbook = writer.book
+	for styleName in styles.keys():
+		workbook.add_named_style(styles[styleName])
+
+	return workbook['Date']
+
+def legacyStyleColumn(worksheet, column, type):
+	# the per-cell loop styleColumn used before
+	dataStyles = getConfig().data['dataStyles']
+
+	for row in range(0, worksheet.max_row):
+		worksheet[column][row].style = dataStyles[type]['style']
+
+def timeStyling(worksheet, function) -> float:
+	start = timer.perf_counter()
+
+	for column in 'ABCDEFGHIJKLMNOPQ':
+		function(worksheet, column, 'Hours')
+
+	return timer.perf_counter() - start
+
+if __name__ == '__main__':
+	rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+	legacyRows = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+	worksheet = statusWorksheet(statusFrame(rows))
+
+	start = timer.perf_counter()
+	formatTimeByDate(worksheet)
+	formatSeconds = timer.perf_counter() - start
+
+	print(f'\nformatTimeByDate on {rows} rows: {formatSeconds:.2f}s')
+
+	# the old loop is quadratic in the row count so it is compared on a smaller sheet
+	df = statusFrame(legacyRows)
+	legacySeconds = timeStyling(statusWorksheet(df), legacyStyleColumn)
+	columnSeconds = timeStyling(statusWorksheet(df), styleColumn)
+
+	print(f'\nstyling 17 columns of {legacyRows} rows')
+	print(f'per-cell:       {legacySeconds:.3f}s')
+	print(f'column at once: {columnSeconds:.3f}s')
+	print(f'speedup:        {legacySeconds / columnSeconds:.1f}x')
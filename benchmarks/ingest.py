@@ -0,0 +1,38 @@
+#!/usr/local/bin/python
+# Compares the default activity loader with the fast categorical loader (C and pyarrow engines).
+# Run from the repository root: python benchmarks/ingest.py [rows]
+import os
+import sys
+import tempfile
+import tracemalloc
+import time as timer
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from EmployeeTime import EmployeeTime
+from syntheticActivity import writeActivityFile
+
+def load(filename, **options):
+	tracemalloc.start()
+	start = timer.perf_counter()
+	data = EmployeeTime(filename=filename, **options).data
+	seconds = timer.perf_counter() - start
+	peak = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+	return data, seconds, peak
+
+if __name__ == '__main__':
+	rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+	with tempfile.TemporaryDirectory() as directory:
+		activityFile = writeActivityFile(os.path.join(directory, 'activity.csv'), rows)
+
+		expected, seconds, peak = load(activityFile)
+		print(f'\nLoaded {len(expected)} rows')
+		print(f'default:         {seconds:.3f}s, peak {peak / 1e6:.0f} MB')
+
+		for engine in ['c', 'pyarrow']:
+			data, seconds, peak = load(activityFile, fast=True, engine=engine)
+			pd.testing.assert_frame_equal(expected, data)
+			print(f'fast ({engine}):'.ljust(17) + f'{seconds:.3f}s, peak {peak / 1e6:.0f} MB')
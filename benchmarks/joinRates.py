@@ -0,0 +1,69 @@
+#!/usr/local/bin/python
+# Compares the row-wise Rate/Description resolution that EmployeeTime.joinWith
+# used to do with the vectorized rates()/descriptions() over a synthetic activity file.
+# Run from the repository root: python benchmarks/joinRates.py [rows]
+import os
+import sys
+import tempfile
+import time as timer
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from EmployeeTime import EmployeeTime, rates, descriptions
+from EmployeeInfo import EmployeeInfo
+from BillingRates import BillingRates
+from Allowances import Allowances
+from syntheticActivity import writeActivityFile, writeAllowancesFile
+
+def rate(row):
+	if row['RateType'] == 'Overtime':
+		return row['BillRateOT']
+	
+	if row['RateType'] == 'Regular':
+		return row['BillRateReg']
+	
+	return 0
+
+def description(row):
+	if row['RateType'] == 'Overtime':
+		return '(Overtime)'
+	
+	if row['RateType'] == 'Regular':
+		return row['Category']
+	
+	return 0
+
+if __name__ == '__main__':
+	rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+	with tempfile.TemporaryDirectory() as directory:
+		activityFile = writeActivityFile(os.path.join(directory, 'activity.csv'), rows)
+		allowancesFile = writeAllowancesFile(os.path.join(directory, 'AllowanceRates.csv'))
+
+		time = EmployeeTime(filename=activityFile)
+		billingRates = BillingRates(effectiveDate=time.dateEnd)
+		billingRates.joinWith(Allowances(effectiveDate=time.dateEnd, filename=allowancesFile))
+		employees = EmployeeInfo()
+		employees.joinWith(billingRates)
+
+	# the frame joinWith resolves rates on
+	joined = time.data.join(employees.data.set_index('EmployeeID'), on='EmployeeID', how='left', rsuffix='_info')
+	print(f'\nResolving rates for {len(joined)} rows')
+
+	start = timer.perf_counter()
+	rowRate = pd.to_numeric(joined.apply(rate, axis=1), errors='coerce')
+	rowDescription = joined.apply(description, axis=1)
+	rowSeconds = timer.perf_counter() - start
+
+	start = timer.perf_counter()
+	vectorRate = pd.to_numeric(pd.Series(rates(joined), index=joined.index), errors='coerce')
+	vectorDescription = pd.Series(descriptions(joined), index=joined.index)
+	vectorSeconds = timer.perf_counter() - start
+
+	pd.testing.assert_series_equal(rowRate, vectorRate, check_names=False)
+	pd.testing.assert_series_equal(rowDescription, vectorDescription, check_names=False)
+
+	print(f'row-wise apply: {rowSeconds:.3f}s')
+	print(f'vectorized:     {vectorSeconds:.3f}s')
+	print(f'speedup:        {rowSeconds / vectorSeconds:.1f}x')
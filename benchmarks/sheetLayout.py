@@ -0,0 +1,157 @@
+#!/usr/local/bin/python
+# Builds the Status, Approvals, Labor and Post workbooks from a synthetic activity file twice: as the
+# scripts write them now, with the data at its final position, and with the layout they used before,
+# where the frames were written at the top left with their index and the format functions made room
+# with delete_cols/insert_rows. Every sheet, cell value, style, number format and merged range has to match.
+# Run from the repository root: python benchmarks/sheetLayout.py [rows]
+import os
+import sys
+import tempfile
+import time as timer
+import pandas as pd
+from openpyxl import load_workbook
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import InvoiceFormat
+from EmployeeTime import EmployeeTime
+from EmployeeInfo import EmployeeInfo
+from BillingRates import BillingRates
+from Allowances import Allowances
+from LaborData import LaborData
+from Jobs import runJobs
+from Status import statusJobs
+from Approvals import approvalsJobs
+from LaborInvoices import laborJobs
+from PostInvoices import postJobs
+from syntheticActivity import writeActivityFile, writeAllowancesFile
+
+# how far each tab's data sat from its final position in the old layout
+LegacyStartRows = {'Employee': 1, 'Date': 1, 'Hours-': 3, 'Details-': 3}
+
+def deleteIndexColumn(worksheet):
+	worksheet.delete_cols(1, 1)
+
+def insertRows(count):
+	def insert(worksheet):
+		worksheet.insert_rows(1, count)
+
+	return insert
+
+# the cells the old format functions moved before formatting
+LegacyShifts = {
+	'formatInvoiceTab': deleteIndexColumn,
+	'formatCostsTab': deleteIndexColumn,
+	'formatHoursTab': insertRows(3),
+	'formatHoursDetailsTab': insertRows(3),
+	'formatTimeByDate': insertRows(1),
+	'formatTimeByEmployee': insertRows(1)
+}
+
+def legacyToExcel(toExcel):
+	# writes a frame where the old scripts did: at the top of the Status and Approvals tabs,
+	# and with the index in front of the invoice line items
+	def written(df, writer, sheet_name='Sheet1', startrow=0, startcol=0, header=True, index=True, **options):
+		for prefix, rows in LegacyStartRows.items():
+			if sheet_name.startswith(prefix) and header:
+				startrow -= rows
+
+		if not header and startcol == 0:
+			index = True
+
+		return toExcel(df, writer, sheet_name=sheet_name, startrow=startrow, startcol=startcol, header=header, index=index, **options)
+
+	return written
+
+def legacyFormat(function, shift):
+	def formatted(worksheet, *arguments, **options):
+		shift(worksheet)
+		return function(worksheet, *arguments, **options)
+
+	return formatted
+
+def writeWorkbooks(labor: LaborData, directory: str) -> list:
+	os.makedirs(directory)
+	os.chdir(directory)
+
+	jobList = statusJobs(labor) + approvalsJobs(labor) + laborJobs(labor) + postJobs(labor)
+	return sorted(runJobs(labor, jobList, 1))
+
+def writeLegacyWorkbooks(labor: LaborData, directory: str) -> list:
+	toExcel = pd.DataFrame.to_excel
+	formats = {name: getattr(InvoiceFormat, name) for name in LegacyShifts}
+
+	# the scripts import the format functions when they write, so they pick up the old versions
+	pd.DataFrame.to_excel = legacyToExcel(toExcel)
+	for name, shift in LegacyShifts.items():
+		setattr(InvoiceFormat, name, legacyFormat(formats[name], shift))
+
+	try:
+		return writeWorkbooks(labor, directory)
+	finally:
+		pd.DataFrame.to_excel = toExcel
+		for name, function in formats.items():
+			setattr(InvoiceFormat, name, function)
+
+def cells(worksheet) -> list:
+	return [
+		[(cell.value, cell.style, cell.number_format) for cell in row]
+		for row in worksheet.iter_rows(min_row=1, max_row=worksheet.max_row, max_col=worksheet.max_column)
+	]
+
+def compareWorkbooks(filename, legacyFilename):
+	workbook = load_workbook(filename)
+	legacy = load_workbook(legacyFilename)
+
+	assert workbook.sheetnames == legacy.sheetnames, f'{filename}: sheets {workbook.sheetnames} != {legacy.sheetnames}'
+
+	for sheetName in workbook.sheetnames:
+		worksheet = workbook[sheetName]
+		legacySheet = legacy[sheetName]
+
+		assert cells(worksheet) == cells(legacySheet), f'{filename} {sheetName}: cells differ'
+
+		ranges = sorted(str(cellRange) for cellRange in worksheet.merged_cells.ranges)
+		legacyRanges = sorted(str(cellRange) for cellRange in legacySheet.merged_cells.ranges)
+		assert ranges == legacyRanges, f'{filename} {sheetName}: merged ranges {ranges} != {legacyRanges}'
+
+if __name__ == '__main__':
+	rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+	root = os.getcwd()
+
+	with tempfile.TemporaryDirectory() as directory:
+		activityFile = writeActivityFile(os.path.join(directory, 'activity.csv'), rows, billable=True)
+		allowancesFile = writeAllowancesFile(os.path.join(directory, 'AllowanceRates.csv'))
+
+		time = EmployeeTime(filename=activityFile)
+		allowances = Allowances(effectiveDate=time.dateEnd, filename=allowancesFile, useCache=False)
+		billingRates = BillingRates(effectiveDate=time.dateEnd, useCache=False)
+		billingRates.joinWith(allowances)
+		employees = EmployeeInfo(useCache=False)
+		employees.joinWith(billingRates)
+		time.joinWith(employees, billingRates, allowances)
+		labor = LaborData(time)
+
+		# the logo is read relative to the repository root and kept for every sheet after that
+		InvoiceFormat.logoData()
+
+		try:
+			start = timer.perf_counter()
+			outputFiles = writeWorkbooks(labor, os.path.join(directory, 'current'))
+			seconds = timer.perf_counter() - start
+
+			start = timer.perf_counter()
+			legacyFiles = writeLegacyWorkbooks(labor, os.path.join(directory, 'legacy'))
+			legacySeconds = timer.perf_counter() - start
+		finally:
+			os.chdir(root)
+
+		assert outputFiles == legacyFiles, f'{outputFiles} != {legacyFiles}'
+
+		for outputFile in outputFiles:
+			compareWorkbooks(os.path.join(directory, 'current', outputFile), os.path.join(directory, 'legacy', outputFile))
+
+	print(f'\n{len(outputFiles)} workbooks from {rows} activity rows are the same in both layouts')
+	print(f'shifting cells: {legacySeconds:.2f}s')
+	print(f'final position: {seconds:.2f}s')
@@ -0,0 +1,58 @@
+#!/usr/local/bin/python
+# Times how long each command line script takes to start, by running it without arguments
+# so it only prints its usage, and lists the imports that account for most of that time.
+# Run from the repository root: python benchmarks/startup.py [runs] [script ...]
+import os
+import sys
+import subprocess
+import time as timer
+
+Root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+Scripts = [
+	'Status.py', 'Approvals.py', 'LaborInvoices.py', 'PostInvoices.py',
+	'LaborRevision.py', 'PostRevision.py', 'MonthEnd.py'
+]
+
+def startupSeconds(script, runs) -> float:
+	# the fastest of several runs, the others are mostly disk and scheduler noise
+	times = []
+
+	for run in range(runs):
+		start = timer.perf_counter()
+		subprocess.run([sys.executable, script], cwd=Root, capture_output=True)
+		times.append(timer.perf_counter() - start)
+
+	return min(times)
+
+def importTimes(script) -> dict:
+	# -X importtime reports "self | cumulative | module" in microseconds on stderr
+	result = subprocess.run([sys.executable, '-X', 'importtime', script], cwd=Root, capture_output=True, text=True)
+	times = {}
+
+	for line in result.stderr.splitlines():
+		if not line.startswith('import time:') or 'cumulative' in line:
+			continue
+
+		fields = line[len('import time:'):].split('|')
+		module = fields[2].rstrip()
+
+		# only top level imports, their cumulative time includes everything they pulled in
+		if module.startswith(' ') and not module.startswith('  '):
+			times[module.strip()] = int(fields[1])
+
+	return times
+
+if __name__ == '__main__':
+	runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+	scripts = sys.argv[2:] if len(sys.argv) > 2 else Scripts
+
+	print(f'\n{"script":<20} {"startup":>9} {"imports":>9}  heaviest imports')
+
+	for script in scripts:
+		seconds = startupSeconds(script, runs)
+		times = importTimes(script)
+		heaviest = sorted(times.items(), key=lambda item: item[1], reverse=True)[:3]
+
+		described = ', '.join(f'{module} {microseconds / 1000:.0f}ms' for module, microseconds in heaviest)
+		print(f'{script:<20} {seconds * 1000:7.0f}ms {sum(times.values()) / 1000:7.0f}ms  {described}')
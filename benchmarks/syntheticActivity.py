@@ -0,0 +1,72 @@
+#!/usr/local/bin/python
+# Writes a synthetic Intacct activity export for benchmarking.
+# Run from the repository root so that data/ resolves.
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from EmployeeInfo import EmployeeInfo
+from BillingRates import BillingRates
+
+TaskNames = [
+	'Regular', 'Overtime', 'Scheduled Overtime', 'Unscheduled/ Emergency OT', 'On Call- Overtime',
+	'Holiday', 'Local Holiday', 'Bereavement', 'Vacation', 'Admin'
+]
+
+States = ['Approved', 'Approved', 'Approved', 'Approved', 'Submitted', 'Draft']
+
+def writeActivityFile(filename, rows, seed=0, billable=False):
+	employees = EmployeeInfo().data
+
+	if billable:
+		# only employees whose role is billed in a country, like the real export, so every row lands in a CLIN
+		rates = BillingRates().data
+		employees = employees.loc[employees['RoleID'].isin(rates.loc[rates['Country'].notna(), 'RoleID'])]
+
+	employees = employees[['EmployeeID', 'EmployeeName']]
+	rng = np.random.default_rng(seed)
+
+	# the export uses "Last First M" names
+	picks = rng.integers(0, len(employees), rows)
+	names = employees['EmployeeName'].str.replace(',', '').to_numpy()[picks]
+	ids = employees['EmployeeID'].to_numpy()[picks]
+
+	dates = pd.date_range('2024-01-01', '2024-01-31').strftime('%m/%d/%Y').to_numpy()
+	regions = np.array(['19AQMM23C0047 Embassy Asia', '19AQMM23C0047 Embassy Europe'])
+
+	df = pd.DataFrame({
+		'Employee Name': names,
+		'Employee ID': ids,
+		'Entry Date': dates[rng.integers(0, len(dates), rows)],
+		'Project Name': regions[rng.integers(0, len(regions), rows)],
+		'Task Name': np.array(TaskNames)[rng.integers(0, len(TaskNames), rows)],
+		'Duration': rng.choice([1, 2, 4, 8], rows),
+		'State': np.array(States)[rng.integers(0, len(States), rows)]
+	})
+
+	df.to_csv(filename, index=False, encoding='latin1')
+	return filename
+
+def writeAllowancesFile(filename):
+	# a flat allowance table covering every post in the billing rates
+	posts = BillingRates().data['PostName'].dropna().unique()
+
+	df = pd.DataFrame({
+		'EffectiveDate': '2023-01-01',
+		'PostName': posts,
+		'PostingRate': 20,
+		'DangerRate': 10
+	})
+
+	df.to_csv(filename, index=False)
+	return filename
+
+if __name__ == '__main__':
+	if len(sys.argv) < 3:
+		print(f'Usage: {sys.argv[0]} <output file> <rows>')
+		sys.exit(1)
+
+	writeActivityFile(sys.argv[1], int(sys.argv[2]))
@@ -6,11 +6,14 @@ from EmployeeTime import EmployeeTime
 from EmployeeInfo import EmployeeInfo
 from BillingRates import BillingRates
 from Allowances import Allowances
+from Jobs import parseNoCache
 
-billingRates = BillingRates()
-allowances = Allowances()
+useCache, sys.argv[1:] = parseNoCache(sys.argv[1:])
+
+billingRates = BillingRates(useCache=useCache)
+allowances = Allowances(useCache=useCache)
 billingRates.joinWith(allowances)
-employees = EmployeeInfo()
+employees = EmployeeInfo(useCache=useCache)
 employees.joinWith(billingRates)
 
 comparison = employees.data[['EmployeeName', 'EmployeeID', 'Country', 'PostName', 'RoleID', 'Title', 'Category']]
@@ -20,12 +23,12 @@ comparison.to_csv('employeeInfoComparison.csv', index=False)
 exit()
 
 if len(sys.argv) < 2:
-    print(f'Usage: {sys.argv[0]} <billing activity file>')
+    print(f'Usage: {sys.argv[0]} [--no-cache] <billing activity file>')
     sys.exit(1)
 
 filename = sys.argv[1]
 time = EmployeeTime(filename)
-time.joinWith(employees)
+time.joinWith(employees, billingRates, allowances)
 
 print('\nEmployee Time:')
 print(time.data)
\ No newline at end of file
@@ -3,14 +3,19 @@ import sys
 import pandas as pd
 
 from BillingRates import BillingRates
-billingRates = BillingRates()
+from ExcelCache import readExcel
+from Jobs import parseNoCache
+
+useCache, sys.argv[1:] = parseNoCache(sys.argv[1:])
+
+billingRates = BillingRates(useCache=useCache)
 
 if len(sys.argv) < 2:
-    print(f"Usage: python3 {sys.argv[0]} <data.csv>")
+    print(f"Usage: python3 {sys.argv[0]} [--no-cache] <data.csv>")
     sys.exit(1)
 
 filename = sys.argv[1]
-data = pd.read_excel(filename, header=3)
+data = readExcel(filename, useCache=useCache, header=3)
 
 print(f'\nLoaded {len(data)} rows from {filename}')
 # print(data[['P_CLIN', 'RT', 'OT']])